@@ -0,0 +1,9 @@
+
+import os, sys
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+kw = eval(sys.argv[2]); s = LevelDBStore(**kw); g = ConjunctiveGraph(s); g.open(sys.argv[1], create=sys.argv[3]=="1")
+g1 = Graph(s, URIRef("urn:g"))
+for n in range(int(sys.argv[4]), int(sys.argv[4])+15):
+    g1.add((URIRef(f"urn:s{n}"), URIRef("urn:p"), URIRef(f"urn:o{n}")))
+os._exit(0)
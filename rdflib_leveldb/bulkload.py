@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+Offline bulk loading of N-Triples/N-Quads files into a new LevelDB store.
+
+Loading through ``Graph.parse`` checks each triple for existence and
+writes its index keys in whatever order the triples arrive. For a first
+load into an empty store neither is necessary: ``bulk_load`` allocates
+term ids in a single pass, external-sorts the encoded keys of all three
+indices (and of the term dictionary) on disk and then writes them in key
+order, which leaves LevelDB's compaction very little to do.
+
+Usage::
+
+    from rdflib_leveldb.bulkload import bulk_load
+
+    bulk_load("/path/to/db", ["dump.nq", "more.nt.gz"])
+
+or, from the command line::
+
+    $ rdflib-leveldb-load /path/to/db dump.nq more.nt.gz
+
+Triples in N-Triples files, and in N-Quads lines without a graph label,
+are loaded into the ``default_context`` graph.
+
+Parsing is CPU-bound, ``parallel_load`` (``--processes`` on the command
+line) splits uncompressed files into line-aligned chunks which a pool of
+worker processes parses and serializes. The serialized quads are funnelled
+back to the calling process, the only one to open the LevelDB store,
+which assigns the term ids so they stay consistent across workers.
+"""
+import argparse
+import gzip
+import heapq
+import io
+import multiprocessing
+import os
+import struct
+import tempfile
+import uuid
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID, Graph
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import ParseError, r_tail, r_wspace
+from rdflib.store import VALID_STORE
+from rdflib.term import URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore, _chunks
+
+__all__ = ["bulk_load", "parallel_load"]
+
+_lengths = struct.Struct(">II")
+
+
+class _QuadParser(NQuadsParser):
+    """
+    An N-Quads (and so N-Triples) parser which yields each statement as
+    an (s, p, o, context identifier) quad instead of adding it to a graph.
+    """
+
+    def __init__(self, default_context, bnode_context=None):
+        super(_QuadParser, self).__init__(bnode_context=bnode_context)
+        self.default_context = default_context
+
+    def quads(self, f):
+        self.file = f
+        self.buffer = ""
+        while True:
+            self.line = line = self.readline()
+            if self.line is None:
+                break
+            try:
+                quad = self.parsequad()
+            except ParseError as msg:
+                raise ParseError("Invalid line (%s):\n%r" % (msg, line))
+            if quad is not None:
+                yield quad
+
+    def parsequad(self):
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith("#"):
+            return None  # The line is empty or a comment
+
+        subject = self.subject()
+        self.eat(r_wspace)
+
+        predicate = self.predicate()
+        self.eat(r_wspace)
+
+        obj = self.object()
+        self.eat(r_wspace)
+
+        context = self.uriref() or self.nodeid() or self.default_context
+        self.eat(r_tail)
+
+        if self.line:
+            raise ParseError("Trailing garbage")
+        return subject, predicate, obj, context
+
+
+def _open(source):
+    if source.endswith(".gz"):
+        return gzip.open(source, "rt", encoding="utf-8")
+    return open(source, "r", encoding="utf-8")
+
+
+def parse_quads(sources, default_context=DATASET_DEFAULT_GRAPH_ID):
+    """
+    Yields the (s, p, o, context identifier) quads of each of the
+    N-Triples/N-Quads files in sources (".gz" files are decompressed).
+    """
+    for source in sources:
+        with _open(source) as f:
+            yield from _QuadParser(default_context).quads(f)
+
+
+class _BNodeLabels(dict):
+    """
+    A parser bnode_context giving each blank node label a BNode id derived
+    from the label, so that all the chunks of a file agree on it.
+    """
+
+    def __init__(self, prefix):
+        super(_BNodeLabels, self).__init__()
+        self.prefix = prefix
+
+    def get(self, label, default=None):
+        return self.prefix + label
+
+
+def _file_chunks(source, chunk_bytes):
+    """
+    Splits source into (source, start, end, bnode prefix) byte ranges
+    of about chunk_bytes, each ending at the end of a line. Compressed
+    files cannot be split.
+    """
+    prefix = uuid.uuid4().hex
+    size = os.path.getsize(source)
+    if source.endswith(".gz"):
+        return [(source, 0, None, prefix)]
+    chunks = []
+    start = 0
+    with open(source, "rb") as f:
+        while start < size:
+            f.seek(start + chunk_bytes)
+            f.readline()
+            end = min(f.tell(), size)
+            chunks.append((source, start, end, prefix))
+            start = end
+    return chunks
+
+
+def _encode_chunk(chunk):
+    """
+    Parses a chunk of a file, returning its terms (serialized by a
+    LevelDBStore with the load's options) and its quads as indexes into
+    them.
+    """
+    source, start, end, prefix = chunk
+    if end is None:
+        f = _open(source)
+    else:
+        with open(source, "rb") as raw:
+            raw.seek(start)
+            f = io.StringIO(raw.read(end - start).decode("utf-8"))
+    default_context, bnode_prefix, store_options = _worker_options
+    parser = _QuadParser(default_context, _BNodeLabels(bnode_prefix + prefix))
+    store = LevelDBStore(**store_options)
+    dumps = store._dumps
+    indexes = {}
+    terms = []
+    quads = []
+
+    def index(term):
+        i = indexes.get(term)
+        if i is None:
+            i = indexes[term] = len(terms)
+            terms.append(dumps(term))
+        return i
+
+    graphs = {}
+    with f:
+        for s, p, o, c in parser.quads(f):
+            context = graphs.get(c)
+            if context is None:
+                context = graphs[c] = Graph(store, c)
+            quads.append((index(s), index(p), index(o), index(context)))
+    return terms, quads
+
+
+_worker_options = None
+
+
+def _init_worker(default_context, bnode_prefix, store_options):
+    global _worker_options
+    _worker_options = (default_context, bnode_prefix, store_options)
+
+
+def _write_run(entries, tmpdir):
+    run = tempfile.TemporaryFile(dir=tmpdir)
+    pack = _lengths.pack
+    for key, value in entries:
+        run.write(pack(len(key), len(value)))
+        run.write(key)
+        run.write(value)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    size = _lengths.size
+    unpack = _lengths.unpack
+    read = run.read
+    try:
+        while True:
+            lengths = read(size)
+            if not lengths:
+                return
+            key_length, value_length = unpack(lengths)
+            yield read(key_length), read(value_length)
+    finally:
+        run.close()
+
+
+def external_sort(entries, merge, run_size=1000000, tmpdir=None):
+    """
+    Yields the (key, value) entries in key order, each key once, with the
+    values of duplicate keys combined by merge(key, value, other).
+
+    Runs of run_size entries are sorted in memory and spilled to
+    temporary files in tmpdir, which are then merged.
+    """
+    runs = []
+    for chunk in _chunks(entries, run_size):
+        chunk.sort()
+        if not runs and len(chunk) < run_size:
+            # Everything fitted in memory, no need to spill
+            merged = iter(chunk)
+            break
+        runs.append(_write_run(chunk, tmpdir))
+    else:
+        merged = heapq.merge(*[_read_run(run) for run in runs])
+
+    previous = next(merged, None)
+    if previous is None:
+        return
+    key, value = previous
+    for next_key, next_value in merged:
+        if next_key == key:
+            value = merge(key, value, next_value)
+        else:
+            yield key, value
+            key, value = next_key, next_value
+    yield key, value
+
+
+def _load(path, quads, pickled, identifier, run_size, tmpdir, **kwargs):
+    store = LevelDBStore(identifier=identifier, **kwargs)
+    if store.open(path, create=True) != VALID_STORE:
+        raise Exception(f"Unable to create a LevelDB store at {path}")
+
+    count = 0
+
+    def counted(quads):
+        nonlocal count
+        for count, quad in enumerate(quads, 1):
+            yield quad
+
+    try:
+        entries = store._bulk_entries(counted(quads), pickled)
+        ordered = external_sort(entries, store._merge_values, run_size, tmpdir)
+        for batch in _chunks(ordered, store.batch_size):
+            with store.db.write_batch() as wb:
+                for key, value in batch:
+                    wb.put(key, value)
+        store.recount()
+        if store.bloom_filter:
+            # Built when the store was still empty
+            store.rebuild_bloom_filter()
+    finally:
+        store.close()
+    return count
+
+
+def bulk_load(
+    path,
+    sources,
+    default_context=DATASET_DEFAULT_GRAPH_ID,
+    identifier=None,
+    run_size=1000000,
+    tmpdir=None,
+    **kwargs,
+):
+    """
+    Creates a new LevelDB store at path holding the statements of the
+    N-Triples/N-Quads files in sources and returns the number of
+    statements read (including any duplicates).
+
+    Any further keyword arguments configure the LevelDBStore, whose
+    batch_size sets the number of keys written per write batch.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    quads = parse_quads(sources, default_context)
+    return _load(path, quads, False, identifier, run_size, tmpdir, **kwargs)
+
+
+def parallel_load(
+    path,
+    sources,
+    processes=None,
+    chunk_bytes=1 << 26,
+    default_context=DATASET_DEFAULT_GRAPH_ID,
+    identifier=None,
+    run_size=1000000,
+    tmpdir=None,
+    **kwargs,
+):
+    """
+    As bulk_load, but with the files split into chunks of about
+    chunk_bytes which are parsed by a pool of processes (by default
+    one per CPU). Gzipped files are parsed whole, by a single worker.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    chunks = []
+    for source in sources:
+        chunks.extend(_file_chunks(source, chunk_bytes))
+    # Blank node ids are only stable within a load
+    bnode_prefix = uuid.uuid4().hex
+
+    with multiprocessing.Pool(
+        processes, _init_worker, (default_context, bnode_prefix, kwargs)
+    ) as pool:
+
+        def quads():
+            for terms, indexes in pool.imap_unordered(_encode_chunk, chunks):
+                for s, p, o, c in indexes:
+                    yield terms[s], terms[p], terms[o], terms[c]
+
+        return _load(path, quads(), True, identifier, run_size, tmpdir, **kwargs)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk load N-Triples/N-Quads files into a new LevelDB store."
+    )
+    parser.add_argument("path", help="path of the LevelDB store to create")
+    parser.add_argument(
+        "sources", nargs="+", help="N-Triples/N-Quads files, optionally gzipped"
+    )
+    parser.add_argument(
+        "--default-graph",
+        default=str(DATASET_DEFAULT_GRAPH_ID),
+        help="graph for triples without a graph label (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--run-size",
+        type=int,
+        default=1000000,
+        help="keys sorted in memory before spilling to disk (default: %(default)s)",
+    )
+    parser.add_argument("--tmpdir", default=None, help="directory for the sorted runs")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="number of parser processes, 0 for one per CPU (default: %(default)s)",
+    )
+    options = parser.parse_args(args)
+    load_options = dict(
+        default_context=URIRef(options.default_graph),
+        run_size=options.run_size,
+        tmpdir=options.tmpdir,
+    )
+    if options.processes == 1:
+        count = bulk_load(options.path, options.sources, **load_options)
+    else:
+        count = parallel_load(
+            options.path,
+            options.sources,
+            processes=options.processes or None,
+            **load_options,
+        )
+    print(f"Loaded {count} statements into {options.path}")
+
+
+if __name__ == "__main__":
+    main()
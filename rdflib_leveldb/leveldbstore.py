@@ -63,11 +63,22 @@ whereas Plyvel offers an interator:
 #     if key.startswith(prefix)])
 
 """
+import atexit
 import os
 import logging
-from functools import lru_cache
+import math
+import queue
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from hashlib import blake2b
+from itertools import islice
+from rdflib.namespace import XSD
 from rdflib.store import Store, VALID_STORE, NO_STORE
-from rdflib.term import URIRef
+from rdflib.term import Literal, URIRef
 from urllib.request import pathname2url
 
 try:
@@ -87,9 +98,436 @@ class NoopMethods(object):
         return lambda *args: None
 
 
+class ThreadBatch(threading.local):
+    "The write batch each thread is collecting, None outside one"
+
+    batch = None
+
+
 __all__ = ["LevelDB"]
 
 
+class DecimalKeys(object):
+    """
+    The original key format: term ids are decimal strings and the parts
+    of a key, and the contexts in a conjunctive index value, are joined
+    with "^".
+    """
+
+    name = b"decimal"
+    # The context id of the conjunctive ("") index keys
+    conjunctive = b""
+
+    @staticmethod
+    def id(n):
+        return str(n).encode()
+
+    @staticmethod
+    def number(i):
+        return int(i)
+
+    @staticmethod
+    def join(parts):
+        return b"^".join(parts) + b"^"
+
+    @staticmethod
+    def split(key):
+        return key.split(b"^", 4)[:4]
+
+    @staticmethod
+    def join_contexts(contexts):
+        return b"^".join(contexts)
+
+    @staticmethod
+    def split_contexts(value):
+        return [c for c in value.split(b"^") if c]
+
+
+class BinaryKeys(object):
+    """
+    Term ids are fixed-width (8 byte) big-endian integers so keys are the
+    plain concatenation of their parts, split by slicing, and ids sort
+    numerically. The conjunctive index uses the (never allocated) id 0.
+    """
+
+    name = b"binary"
+    width = 8
+    conjunctive = bytes(width)
+
+    @staticmethod
+    def id(n):
+        return n.to_bytes(8, "big")
+
+    @staticmethod
+    def number(i):
+        return int.from_bytes(i, "big")
+
+    @staticmethod
+    def join(parts):
+        return b"".join(parts)
+
+    @staticmethod
+    def split(key):
+        return key[0:8], key[8:16], key[16:24], key[24:32]
+
+    @staticmethod
+    def join_contexts(contexts):
+        return b"".join(sorted(contexts))
+
+    @staticmethod
+    def split_contexts(value):
+        return [value[i : i + 8] for i in range(0, len(value), 8)]
+
+
+class VarintKeys(object):
+    """
+    Term ids are a length byte followed by the fewest big-endian bytes
+    holding the number, so small ids stay short while ids still sort
+    numerically (shorter ids first, then by value) and keys are the plain
+    concatenation of their parts. Inlined ids, whose first byte has the
+    top bit set, always have 7 bytes after it. The conjunctive index uses
+    the id of 0, a single zero byte.
+    """
+
+    name = b"varint"
+    conjunctive = b"\0"
+
+    @staticmethod
+    def id(n):
+        data = n.to_bytes((n.bit_length() + 7) // 8, "big")
+        return bytes((len(data),)) + data
+
+    @staticmethod
+    def number(i):
+        return int.from_bytes(i[1:], "big")
+
+    @staticmethod
+    def join(parts):
+        return b"".join(parts)
+
+    @staticmethod
+    def split_contexts(value):
+        ids = []
+        start = 0
+        while start < len(value):
+            n = value[start]
+            end = start + (8 if n & INLINE else n + 1)
+            ids.append(value[start:end])
+            start = end
+        return ids
+
+    @staticmethod
+    def split(key):
+        return VarintKeys.split_contexts(key)
+
+    @staticmethod
+    def join_contexts(contexts):
+        return b"".join(sorted(contexts))
+
+
+key_formats = {
+    keys.name.decode(): keys for keys in (DecimalKeys, BinaryKeys, VarintKeys)
+}
+
+# Inlined BinaryKeys and VarintKeys ids have the top bit of their first
+# byte set, which allocated ids never have, and the type of their value
+# in its other bits. The other 7 bytes hold the value.
+INLINE = 0x80
+INLINE_STRING = 1
+inline_datatypes = {
+    2: XSD.integer,
+    3: XSD.int,
+    4: XSD.long,
+    5: XSD.boolean,
+    6: XSD.date,
+}
+inline_tags = {datatype: tag for tag, datatype in inline_datatypes.items()}
+# Integers are offset so that their ids sort numerically
+INLINE_OFFSET = 1 << 55
+
+
+def inline_id(term):
+    """
+    The BinaryKeys or VarintKeys id holding the value of term, if it is a
+    Literal which fits, else None: an integer of at most 56 bits, a
+    boolean, a date or a plain string of at most 6 bytes, whose lexical
+    form is canonical.
+    """
+    if type(term) is not Literal or term.language is not None:
+        return None
+    datatype = term.datatype
+    if datatype is None:
+        data = term.encode("utf-8", "surrogatepass")
+        if len(data) > 6:
+            return None
+        return bytes((INLINE | INLINE_STRING, len(data))) + data.ljust(6, b"\0")
+    tag = inline_tags.get(datatype)
+    if tag is None:
+        return None
+    value = term.value
+    if datatype == XSD.boolean:
+        if type(value) is not bool or str(term) != ("true" if value else "false"):
+            return None
+        n = int(value)
+    elif datatype == XSD.date:
+        if type(value) is not date or str(term) != value.isoformat():
+            return None
+        n = value.toordinal()
+    else:
+        if type(value) is not int or str(term) != str(value):
+            return None
+        if not -INLINE_OFFSET <= value < INLINE_OFFSET:
+            return None
+        n = value + INLINE_OFFSET
+    return bytes((INLINE | tag,)) + n.to_bytes(7, "big")
+
+
+def term_hash(k, attempt=0):
+    """
+    The 63 bit hash of the serialized term k from which its id is made
+    with hash term ids, a different one for each attempt after the
+    first collided.
+    """
+    digest = blake2b(k, digest_size=8, salt=attempt.to_bytes(16, "big"))
+    return int.from_bytes(digest.digest(), "big") >> 1
+
+
+def inline_term(i):
+    "The Literal whose value the inlined id i holds"
+    tag = i[0] & ~INLINE
+    if tag == INLINE_STRING:
+        return Literal(i[2 : 2 + i[1]].decode("utf-8", "surrogatepass"))
+    datatype = inline_datatypes[tag]
+    n = int.from_bytes(i[1:], "big")
+    if datatype == XSD.boolean:
+        lexical = "true" if n else "false"
+    elif datatype == XSD.date:
+        lexical = date.fromordinal(n).isoformat()
+    else:
+        lexical = str(n - INLINE_OFFSET)
+    return Literal(lexical, datatype=datatype)
+
+
+class PickleTerms(object):
+    """
+    The original term format: terms are pickled by the store's node
+    pickler.
+    """
+
+    name = b"pickle"
+
+    def __init__(self, store):
+        self.dumps = store.node_pickler.dumps
+        self.loads = store.node_pickler.loads
+
+
+class CompactTerms(object):
+    """
+    Terms are a one byte type tag followed by their UTF-8 lexical form,
+    Literals by the lengths of their lexical form and language, both,
+    then their datatype IRI. Graphs of the store are tagged "G" (or "Q"
+    for quoted graphs) followed by their identifier, anything else is
+    pickled after a "P".
+    """
+
+    name = b"compact"
+    lengths = struct.Struct(">IH")
+
+    def __init__(self, store):
+        from rdflib.graph import Graph, QuotedGraph
+        from rdflib.term import BNode, Literal, Variable
+
+        self.store = store
+        self.pickler = store.node_pickler
+        self.Graph = Graph
+        self.QuotedGraph = QuotedGraph
+        self.tags = {URIRef: b"U", BNode: b"B", Variable: b"V"}
+        self.types = {ord(tag): kind for kind, tag in self.tags.items()}
+        self.Literal = Literal
+
+    def dumps(self, term):
+        kind = type(term)
+        tag = self.tags.get(kind)
+        if tag is not None:
+            return tag + term.encode("utf-8", "surrogatepass")
+        if kind is self.Literal:
+            lexical = term.encode("utf-8", "surrogatepass")
+            language = (term.language or "").encode()
+            datatype = (term.datatype or "").encode("utf-8", "surrogatepass")
+            return b"".join(
+                (
+                    b"L",
+                    self.lengths.pack(len(lexical), len(language)),
+                    lexical,
+                    language,
+                    datatype,
+                )
+            )
+        if isinstance(term, self.Graph) and term.store is self.store:
+            tag = b"Q" if isinstance(term, self.QuotedGraph) else b"G"
+            return tag + self.dumps(term.identifier)
+        return b"P" + self.pickler.dumps(term)
+
+    def loads(self, k):
+        kind = self.types.get(k[0])
+        if kind is not None:
+            # The term was checked when it was created, skip the checks
+            # (and the BNode id generation) of the constructors
+            return str.__new__(kind, k[1:].decode("utf-8", "surrogatepass"))
+        tag = k[:1]
+        if tag == b"L":
+            lexical_length, language_length = self.lengths.unpack_from(k, 1)
+            start = 1 + self.lengths.size
+            end = start + lexical_length
+            lexical = k[start:end].decode("utf-8", "surrogatepass")
+            language = k[end : end + language_length].decode()
+            datatype = k[end + language_length :]
+            if datatype:
+                datatype = str.__new__(
+                    URIRef, datatype.decode("utf-8", "surrogatepass")
+                )
+            return self.Literal(
+                lexical, lang=language or None, datatype=datatype or None
+            )
+        if tag == b"G":
+            return self.Graph(self.store, self.loads(k[1:]))
+        if tag == b"Q":
+            return self.QuotedGraph(self.store, self.loads(k[1:]))
+        if tag == b"P":
+            return self.pickler.loads(k[1:])
+        raise ValueError(f"Unknown term tag {tag!r}")
+
+
+term_formats = {terms.name.decode(): terms for terms in (PickleTerms, CompactTerms)}
+
+
+class BloomFilter(object):
+    """
+    A Bloom filter over byte strings, sized to hold capacity of them with
+    the given rate of false positives.
+    """
+
+    header = struct.Struct(">QI")
+
+    def __init__(self, capacity=1000000, error_rate=0.01, bits=None, hashes=None):
+        if bits is None:
+            bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            hashes = max(1, round(bits / capacity * math.log(2)))
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8)
+
+    def positions(self, key):
+        digest = blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def add(self, key):
+        data = self.data
+        for n in self.positions(key):
+            data[n >> 3] |= 1 << (n & 7)
+
+    def __contains__(self, key):
+        data = self.data
+        for n in self.positions(key):
+            if not data[n >> 3] & (1 << (n & 7)):
+                return False
+        return True
+
+    def save(self, path):
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.header.pack(self.bits, self.hashes))
+            f.write(self.data)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            bits, hashes = cls.header.unpack(f.read(cls.header.size))
+            bloom = cls(bits=bits, hashes=hashes)
+            f.readinto(bloom.data)
+        return bloom
+
+
+class TermCache(object):
+    """
+    A cache of up to capacity entries with 2Q eviction: entries seen once
+    wait in a FIFO queue of a quarter of the capacity, and only those
+    asked for again after leaving it (while remembered in a ghost queue)
+    join the LRU main part. A scan over many terms used once therefore
+    cycles through the queue without evicting the frequently used ones.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.recent_capacity = max(1, capacity // 4)
+        self.ghost_capacity = max(1, capacity // 2)
+        self.recent = OrderedDict()
+        self.ghosts = OrderedDict()
+        self.frequent = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.recent) + len(self.frequent)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.frequent:
+                self.frequent.move_to_end(key)
+                self.hits += 1
+                return self.frequent[key]
+            if key in self.recent:
+                self.hits += 1
+                return self.recent[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            if key in self.frequent:
+                self.frequent[key] = value
+                self.frequent.move_to_end(key)
+                return
+            if key in self.recent:
+                self.recent[key] = value
+                return
+            if self.ghosts.pop(key, False) is None:
+                self.frequent[key] = value
+            else:
+                self.recent[key] = value
+            while len(self.recent) + len(self.frequent) > self.capacity:
+                if len(self.recent) > self.recent_capacity or not self.frequent:
+                    key, value = self.recent.popitem(last=False)
+                    self.ghosts[key] = None
+                    if len(self.ghosts) > self.ghost_capacity:
+                        self.ghosts.popitem(last=False)
+                else:
+                    self.frequent.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.recent.pop(key, None)
+            self.frequent.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.recent.clear()
+            self.ghosts.clear()
+            self.frequent.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        "The hits, misses and number of entries"
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
 class LevelDBStore(Store):
     """\
     A store that allows for on-disk persistent using LevelDB, a fast
@@ -108,6 +546,144 @@ class LevelDBStore(Store):
     Windows users should use the Plyvel-wheels distribution which includes
     Windows-specifc leveldb library binaries: (`pip install plyvel-wheels`).
 
+    **NOTE on key formats**:
+
+    New stores are created with the `key_format` given: "varint" (the
+    default), "binary" or "decimal" (the original "^"-joined decimal
+    ids). Both "varint" and "binary" ids sort numerically and are split
+    without searching for a separator. "binary" ids are always 8 bytes,
+    which is more than the 2 to 4 bytes of a "varint" or the 2 to 8 of
+    a "decimal" id (with its separator) in stores of less than about
+    10^7 terms, so it makes the index keys of most stores larger. The
+    format is recorded in the store and stores written before it was
+    recorded are read as "decimal".
+
+    **NOTE on inlined literals**:
+
+    With the "varint" or "binary" key format and `inline_literals=True`
+    (the default), the ids of small Literals hold their value: integers of up
+    to 56 bits, booleans, dates and plain strings of up to 6 bytes. They
+    are not written to the term dictionary, nor read from it. Whether a
+    store inlines them is recorded when it is created.
+
+    **NOTE on term ids**:
+
+    By default (`term_ids="counter"`) term ids are allocated from a
+    counter, in the order terms are first added. With `term_ids="hash"`
+    a term's id is a 63 bit hash of its serialized form instead, so that
+    stores created with the same options give the same terms the same
+    ids. Should the id of a new term already be taken by another, the
+    term is hashed again. `merge()` adds the contents of such a store to
+    another. Like the key format, the scheme is recorded in the store.
+
+    **NOTE on term formats**:
+
+    The term dictionary holds terms in the `term_format` given when the
+    store is created: "compact" (the default) writes a type tag and the
+    lexical form, datatype and language of a term, which decode much
+    faster than "pickle", the node pickler's format. Stores from before
+    the format was recorded are read as "pickle".
+
+    **NOTE on context layouts**:
+
+    With `context_layout="list"` (the default) the contexts of a triple
+    are listed in the value of its conjunctive index keys, which is read
+    and rewritten whenever the triple is added to or removed from a
+    context. `context_layout="index"` keeps them in a membership index
+    instead, one key per (triple, context), which suits triples in many
+    contexts. Like the key format, the layout of a store is recorded
+    when it is created.
+
+    **NOTE on index permutations**:
+
+    The triples are indexed by one ordering of their terms per entry of
+    `permutations`, by default the three cyclic ones ("spo", "pos" and
+    "osp"), each written for every triple. Any orderings of "spo" can be
+    chosen, fewer to save writes and space or others for the queries the
+    defaults don't serve well. A query uses the index whose keys start
+    with the most terms it binds, scanning and filtering its keys if they
+    do not start with all of them. The permutations of a store are
+    recorded when it is created.
+
+    **NOTE on graph-last indices**:
+
+    Each of `graph_permutations` (none by default) adds an index whose
+    keys hold the terms of a triple in that order followed by a context
+    the triple is in, so that the contexts of a triple, or the triples
+    matching a pattern together with their contexts, are found by a
+    single prefix scan. They are used by `contexts(triple)` and by
+    `triples()` across all contexts (`GRAPH ?g` queries) when their keys
+    start with all the terms the pattern binds. The "index" context
+    layout's membership index serves as the "spo" one.
+
+    **NOTE on durability**:
+
+    By default (`durability="none"`) writes are not synced to disk, they
+    survive the process crashing but not the machine crashing.
+    `durability="sync"` syncs every write batch, i.e. every `add()`,
+    `remove()`, `addN()` batch or `commit()`. `durability="group"` shares
+    one sync between all the writes made within `group_commit_interval`
+    seconds, or between `group_commit_size` write batches, whichever is
+    reached first. `sync()` makes the writes so far durable at any time.
+
+    **NOTE on write-behind**:
+
+    With `write_behind=True` write batches are handed to a background
+    thread instead of being written by the caller. Reads see the batches
+    still queued, at most `write_queue_size` of them, after which writers
+    block until the queue drains. `flush()` waits until everything queued
+    has been written, as does `close()`.
+
+    **NOTE on counting**:
+
+    The number of triples in each context, and in the conjunctive graph,
+    is kept up to date by the writes that change it, so `len()` is a
+    single read. Stores created before the counts were kept are counted
+    by scanning their keys, until `recount()` writes the counts.
+
+    **NOTE on statistics**:
+
+    `estimate(pattern, context)` gives the number of triples a pattern
+    is expected to match, to order the patterns of a query. Patterns
+    binding the predicate are estimated from per-predicate statistics
+    (the number of triples and of distinct subjects and objects, in the
+    conjunctive graph) written by `rebuild_statistics()`. The number of
+    triples of each predicate is kept up to date like the other counts,
+    and the distinct subjects and objects are scaled by it. Others, or
+    all of them before the statistics are built, by counting the keys
+    of the pattern's index range up to a limit, and beyond it from the
+    approximate size LevelDB gives for the range.
+
+    **NOTE on the term cache**:
+
+    Term ids, and the terms of ids, are cached per store, up to
+    `term_cache_size` entries each, in a `TermCache` whose eviction
+    keeps frequently used terms through large scans. `term_cache_info()`
+    reports its hits and misses, the cache is cleared on `close()`.
+
+    Queries only look terms up: a bound term which was never added has
+    no id, so nothing matches it and no id is allocated for it. The last
+    `negative_cache_size` such terms are remembered, so repeating the
+    query reads nothing from LevelDB.
+
+    **NOTE on compaction**:
+
+    Removed entries leave tombstones behind in LevelDB until compaction
+    reaches them, slowing down the scans over their ranges. `compact()`
+    compacts the key ranges of a context, or the whole store. With
+    `compaction_threshold` set, a `remove()` of at least that many
+    triples schedules a compaction of the ranges it touched on a
+    background thread, at most one every `compaction_interval` seconds.
+
+    **NOTE on the Bloom filter**:
+
+    With `bloom_filter=True` the store keeps a Bloom filter of its index
+    keys, sized for `bloom_capacity` keys, so that `add()` can skip the
+    existence check of triples which are certainly new. The filter is
+    saved in the database directory on `close()` and removed on `open()`,
+    so it is rebuilt from the indices (see `rebuild_bloom_filter()`) if
+    the store was not closed cleanly.
+
     """
 
     context_aware = True
@@ -117,15 +693,142 @@ class LevelDBStore(Store):
     db_env = None
     should_create = True
 
-    def __init__(self, configuration=None, identifier=None):
+    def __init__(
+        self,
+        configuration=None,
+        identifier=None,
+        batch_size=10000,
+        transactional=False,
+        key_format="varint",
+        term_format="compact",
+        inline_literals=True,
+        term_ids="counter",
+        context_layout="list",
+        permutations=("spo", "pos", "osp"),
+        graph_permutations=(),
+        term_block_size=1000,
+        durability="none",
+        group_commit_interval=1.0,
+        group_commit_size=1000,
+        write_behind=False,
+        write_queue_size=1000,
+        bloom_filter=False,
+        bloom_capacity=1000000,
+        bloom_error_rate=0.01,
+        compaction_threshold=None,
+        compaction_interval=60.0,
+        decode_batch_size=1000,
+        term_cache_size=100000,
+        negative_cache_size=10000,
+    ):
         if not has_wrapper:
             raise ImportError("Unable to import plyvel, store is unusable.")
         self.__open = False
         self._terms = 0
+        # Term ids are leased in blocks of term_block_size, only the end
+        # of the current block (__terms__) is written to the db.
+        self.term_block_size = term_block_size
+        self.__terms_leased = 0
         self.__identifier = identifier
+        self.batch_size = batch_size
+        # triples() decodes the terms of up to decode_batch_size results
+        # at a time
+        self.decode_batch_size = decode_batch_size
+        # The ids of terms (keyed on the term) and terms of ids
+        self.term_cache_size = term_cache_size
+        self.__ids = TermCache(term_cache_size)
+        self.__terms = TermCache(term_cache_size)
+        # Terms recently looked up without an id
+        self.negative_cache_size = negative_cache_size
+        self.__unknown = TermCache(negative_cache_size)
+        # The key format of new stores, existing stores record theirs
+        if key_format not in key_formats:
+            raise ValueError(f"Unknown key format {key_format!r}")
+        self.key_format = key_format
+        if term_format not in term_formats:
+            raise ValueError(f"Unknown term format {term_format!r}")
+        self.term_format = term_format
+        # Whether new (varint or binary key format) stores inline small Literals
+        self.inline_literals = inline_literals
+        self.__inline = False
+        if term_ids not in ("counter", "hash"):
+            raise ValueError(f"Unknown term ids {term_ids!r}")
+        self.term_ids = term_ids
+        if context_layout not in ("list", "index"):
+            raise ValueError(f"Unknown context layout {context_layout!r}")
+        self.context_layout = context_layout
+        # The (triple, context) membership index of the "index" layout
+        self.__membership = None
+        permutations = tuple(permutations)
+        if not permutations or len(set(permutations)) != len(permutations):
+            raise ValueError(f"Invalid index permutations {permutations!r}")
+        for order in permutations:
+            if sorted(order) != ["o", "p", "s"]:
+                raise ValueError(f"Invalid index permutation {order!r}")
+        self.permutations = permutations
+        graph_permutations = tuple(graph_permutations)
+        if len(set(graph_permutations)) != len(graph_permutations):
+            raise ValueError(f"Invalid graph permutations {graph_permutations!r}")
+        for order in graph_permutations:
+            if sorted(order) != ["o", "p", "s"]:
+                raise ValueError(f"Invalid graph permutation {order!r}")
+        self.graph_permutations = graph_permutations
+        # The (index, to_key, from_key) of the graph-last indices
+        self.__graph_indices_info = []
+        # With transactional set, writes are held in __pending until
+        # commit() and are visible to reads in the meantime.
+        self.transactional = transactional
+        self.transaction_aware = transactional
+        # The writes of the open transaction, keyed on the full
+        # (prefixed) key, a value of None marks a deletion.
+        self.__pending = None
+        # The writes of each add() or remove() in progress, in the same
+        # form, which only the thread making them sees until they are
+        # written (or added to the transaction) together.
+        self.__local = ThreadBatch()
+        if durability not in ("none", "sync", "group"):
+            raise ValueError(f"Unknown durability {durability!r}")
+        self.durability = durability
+        self.group_commit_interval = group_commit_interval
+        self.group_commit_size = group_commit_size
+        # Write batches since the last sync, and the timer for the next
+        self.__unsynced = 0
+        self.__sync_timer = None
+        self.__sync_lock = threading.Lock()
+        # Serializes mutations, which may come from more than one thread
+        self.__lock = threading.RLock()
+        # With write_behind set, write batches are queued for a writer
+        # thread and kept in __overlay, as key: (sequence number, value),
+        # until written.
+        self.write_behind = write_behind
+        self.write_queue_size = write_queue_size
+        self.__queue = None
+        self.__writer = None
+        self.__writer_error = None
+        self.__overlay = {}
+        self.__overlay_lock = threading.Lock()
+        self.__sequence = 0
+        self.bloom_filter = bloom_filter
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.__bloom = None
+        # Contexts (None for the whole store) to compact in the background,
+        # their timer and when the last compaction ended
+        self.compaction_threshold = compaction_threshold
+        self.compaction_interval = compaction_interval
+        self.__compaction_ranges = set()
+        self.__compaction_timer = None
+        self.__compaction_lock = threading.Lock()
+        # Held while compacting, so that close() waits for it
+        self.__compacting = threading.Lock()
+        self.__last_compaction = None
         super(LevelDBStore, self).__init__(configuration)
-        self._loads = self.node_pickler.loads
-        self._dumps = self.node_pickler.dumps
+        self.__set_term_format(term_format)
+
+    def __set_term_format(self, term_format):
+        terms = term_formats[term_format](self)
+        self._loads = terms.loads
+        self._dumps = terms.dumps
 
     def __get_identifier(self):
         return self.__identifier
@@ -165,15 +868,86 @@ class LevelDBStore(Store):
                     dbpathname, create_if_missing=False, error_if_exists=False
                 )
 
+        # The format header, stores without one predate it
+        self.__meta = self.db.prefixed_db(b"meta")
+        if self.should_create:
+            keys = key_formats[self.key_format]
+            self.__meta.put(b"key_format", keys.name)
+            self.__meta.put(b"term_format", self.term_format.encode())
+            self.__meta.put(b"term_ids", self.term_ids.encode())
+            self.inline_literals = self.inline_literals and keys is not DecimalKeys
+            if self.inline_literals:
+                self.__meta.put(b"inline_literals", b"1")
+            self.__meta.put(b"context_layout", self.context_layout.encode())
+            self.__meta.put(b"counted", b"1")
+            self.__meta.put(b"permutations", ",".join(self.permutations).encode())
+            self.__meta.put(
+                b"graph_permutations", ",".join(self.graph_permutations).encode()
+            )
+        else:
+            keys = key_formats[
+                (self.__meta.get(b"key_format") or DecimalKeys.name).decode()
+            ]
+            self.key_format = keys.name.decode()
+            self.term_format = (
+                self.__meta.get(b"term_format") or PickleTerms.name
+            ).decode()
+            self.inline_literals = self.__meta.get(b"inline_literals") is not None
+            self.term_ids = (self.__meta.get(b"term_ids") or b"counter").decode()
+            self.context_layout = (
+                self.__meta.get(b"context_layout") or b"list"
+            ).decode()
+            self.permutations = tuple(
+                (self.__meta.get(b"permutations") or b"spo,pos,osp").decode().split(",")
+            )
+            self.graph_permutations = tuple(
+                order
+                for order in (self.__meta.get(b"graph_permutations") or b"")
+                .decode()
+                .split(",")
+                if order
+            )
+        self.__keys = keys
+        self.__inline = self.inline_literals
+        self.__set_term_format(self.term_format)
+        self.__graph_indices_info = []
+        if self.context_layout == "index":
+            # The membership index is a graph-last spo index
+            self.__membership = self.db.prefixed_db(b"membership")
+            self.__graph_indices_info.append(
+                (
+                    self.__membership,
+                    graph_key_func("spo", keys),
+                    graph_from_key_func("spo", keys),
+                )
+            )
+            contexts_of = self.__member_contexts
+        else:
+            self.__membership = None
+            contexts_of = None
+        for order in self.graph_permutations:
+            if self.__membership is not None and order == "spo":
+                continue
+            index_name = graph_key_func(order)((b"s", b"p", b"o"), b"c")
+            self.__graph_indices_info.append(
+                (
+                    self.db.prefixed_db(index_name),
+                    graph_key_func(order, keys),
+                    graph_from_key_func(order, keys),
+                )
+            )
+
         # create and open the DBs
+        orders = [permutation(order) for order in self.permutations]
+        self.__orders = orders
         self.__indices = [
             None,
-        ] * 3
+        ] * len(orders)
         self.__indices_info = [
             None,
-        ] * 3
-        for i in range(0, 3):
-            index_name = to_key_func(i)(
+        ] * len(orders)
+        for i, order in enumerate(orders):
+            index_name = to_key_func(order)(
                 (
                     "s".encode("latin-1"),
                     "p".encode("latin-1"),
@@ -183,59 +957,115 @@ class LevelDBStore(Store):
             )
             index = self.db.prefixed_db(index_name)
             self.__indices[i] = index
-            self.__indices_info[i] = (index, to_key_func(i), from_key_func(i))
+            self.__indices_info[i] = (
+                index,
+                to_key_func(order, keys),
+                from_key_func(order, keys),
+            )
 
         lookup = {}
         for i in range(0, 8):
+            # The index whose keys start with the most bound terms, the
+            # first one given on a tie
             results = []
-            for start in range(0, 3):
-                score = 1
-                len = 0
-                for j in range(start, start + 3):
-                    if i & (1 << (j % 3)):
-                        score = score << 1
-                        len += 1
+            for n, order in enumerate(orders):
+                length = 0
+                for position in order:
+                    if i & (1 << position):
+                        length += 1
                     else:
                         break
-                tie_break = 2 - start
-                results.append(((score, tie_break), start, len))
-
-            results.sort()
-            score, start, len = results[-1]
+                results.append((length, -n))
+
+            length, n = max(results)
+            order = orders[-n]
+            # Bound terms after the prefix are matched by filtering the
+            # keys, as (key part, triple position) pairs
+            residual = tuple(
+                (k + 1, position)
+                for k, position in enumerate(order)
+                if k >= length and i & (1 << position)
+            )
 
-            def get_prefix_func(start, end):
+            def get_prefix_func(order, length):
                 def get_prefix(triple, context):
                     if context is None:
-                        yield ""
+                        yield keys.conjunctive
                     else:
                         yield context
-                    i = start
-                    while i < end:
-                        yield triple[i % 3]
-                        i += 1
-                    yield ""
+                    for position in order[:length]:
+                        yield triple[position]
 
                 return get_prefix
 
             lookup[i] = (
-                self.__indices[start],
-                get_prefix_func(start, start + len),
-                from_key_func(start),
-                results_from_key_func(start, self._from_string),
+                self.__indices[-n],
+                get_prefix_func(order, length),
+                from_key_func(order, keys),
+                results_from_key_func(order, self._from_string, keys, contexts_of),
+                residual,
             )
 
         self.__lookup_dict = lookup
+
+        # The first graph-last index whose keys start with all the bound
+        # terms of each pattern
+        graph_lookup = {}
+        for i in range(0, 8):
+            bound = bin(i).count("1")
+            for index, to_key, from_key in self.__graph_indices_info:
+                if all(i & (1 << position) for position in to_key.order[:bound]):
+                    graph_lookup[i] = (index, to_key, from_key)
+                    break
+        self.__graph_lookup_dict = graph_lookup
         self.__contexts = self.db.prefixed_db(b"contexts")
+        # The number of triples in each context, by context id
+        self.__counts = self.db.prefixed_db(b"counts")
+        # The number of triples of each predicate in the conjunctive
+        # graph, by predicate id, kept like the counts
+        self.__predicates = self.db.prefixed_db(b"predicates")
+        # The statistics of each predicate, by predicate id
+        self.__statistics = self.db.prefixed_db(b"statistics")
+        self.__counted = self.__meta.get(b"counted") is not None
         self.__namespace = self.db.prefixed_db(b"namespace")
         self.__prefix = self.db.prefixed_db(b"prefix")
         self.__k2i = self.db.prefixed_db(b"k2i")
         self.__i2k = self.db.prefixed_db(b"i2k")
 
         try:
-            self._terms = int(self.__k2i.get(b"__terms__"))
-            assert isinstance(self._terms, int)
+            self.__terms_leased = int(self.__k2i.get(b"__terms__"))
+            assert isinstance(self.__terms_leased, int)
         except TypeError:
-            pass  # new store, no problem
+            self.__terms_leased = 0  # new store, no problem
+        self._terms = self.__terms_leased
+        if keys is not DecimalKeys and self.term_ids == "counter":
+            # After a crash the leased block may be only partly used, the
+            # highest id in use is the last i2k key.
+            for i in self.__i2k.iterator(reverse=True, include_value=False):
+                self._terms = keys.number(i)
+                break
+
+        # A saved filter is only trusted until the store is next modified
+        bloom_path = os.path.join(dbpathname, "bloom.filter")
+        if os.path.exists(bloom_path):
+            if self.bloom_filter:
+                self.__bloom = BloomFilter.load(bloom_path)
+            os.remove(bloom_path)
+        if self.bloom_filter and self.__bloom is None:
+            self.rebuild_bloom_filter()
+
+        if self.transactional:
+            self.__pending = {}
+
+        if self.write_behind:
+            self.__queue = queue.Queue(self.write_queue_size)
+            self.__writer = threading.Thread(
+                target=self.__write_behind, name="LevelDBStore writer", daemon=True
+            )
+            self.__writer.start()
+            # The writer is a daemon thread, which would be stopped with
+            # writes still queued if the process exits without close()
+            atexit.register(self.flush)
 
         self.__open = True
 
@@ -245,10 +1075,16 @@ class LevelDBStore(Store):
         from pprint import pformat
 
         dbs = {
+            "self.__meta": self.__meta,
             "self.__indices": self.__indices,
             "self.__indices_info": self.__indices_info,
             "self.__lookup_dict": self.__lookup_dict,
             "self.__contexts": self.__contexts,
+            "self.__counts": self.__counts,
+            "self.__predicates": self.__predicates,
+            "self.__statistics": self.__statistics,
+            "self.__membership": self.__membership,
+            "self.__graph_indices_info": self.__graph_indices_info,
             "self.__namespace": self.__namespace,
             "self.__prefix": self.__prefix,
             "self.__k2i": self.__k2i,
@@ -264,10 +1100,239 @@ class LevelDBStore(Store):
                     logger.debug(f"\t{key}: {val}")
 
     def close(self, commit_pending_transaction=False):
-        self.__open = False
+        if self.transactional:
+            if commit_pending_transaction:
+                self.commit()
+            else:
+                self.rollback()
+            self.__pending = None
+        if self.__writer is not None:
+            self.__queue.put(None)
+            self.__writer.join()
+            self.__writer = self.__queue = None
+            atexit.unregister(self.flush)
+        if self.__open and self._terms < self.__terms_leased:
+            # Hand back the unused part of the leased block
+            self.__k2i.put(b"__terms__", str(self._terms).encode())
+        if self.__open and self.__unsynced:
+            self.sync()
+        if self.__open and self.__bloom is not None:
+            self.__bloom.save(os.path.join(os.path.abspath(self.path), "bloom.filter"))
+            self.__bloom = None
+        with self.__compaction_lock:
+            if self.__compaction_timer is not None:
+                self.__compaction_timer.cancel()
+                self.__compaction_timer = None
+            self.__compaction_ranges = set()
+        self.__ids.clear()
+        self.__terms.clear()
+        self.__unknown.clear()
+        with self.__compacting, self.__sync_lock:
+            self.__open = False
         # Closing the database also closes the prefixed databases
         self.db.close()
 
+    def merge(self, path):
+        """
+        Add the triples, contexts and terms of the (closed) store at path,
+        which must have been created with hash term ids and the same
+        options as this one, so that its keys are this store's keys.
+
+        Both term dictionaries are checked first: a term with different
+        ids in the two stores, or an id of different terms, raises a
+        ValueError before anything is written.
+        """
+        assert self.__open, "The Store must be open."
+        assert self.term_ids == "hash", "Only stores with hash ids can be merged."
+        other = LevelDB(os.path.abspath(path), create_if_missing=False)
+        try:
+            header = dict(other.prefixed_db(self.__meta.prefix).iterator())
+            header.pop(b"counted", None)
+            own = dict(self.__meta.iterator())
+            own.pop(b"counted", None)
+            if header != own:
+                raise ValueError(f"The store at {path} has different options")
+
+            k2i = other.prefixed_db(self.__k2i.prefix)
+            for k, i in k2i.iterator():
+                mine = self.__k2i.get(k)
+                if mine is not None and mine != i:
+                    raise ValueError(f"Term {k!r} has different ids")
+                if mine is None and self.__i2k.get(i) is not None:
+                    raise ValueError(f"Id {i!r} is used by different terms")
+
+            dbs = [self.__i2k, self.__k2i, self.__contexts]
+            dbs.extend(self.__indices)
+            dbs.extend(index for index, _, _ in self.__graph_indices_info)
+            with self.__lock:
+                assert not self.__pending, "Commit or roll back the transaction first."
+                self.flush()
+                writes = {}
+                for db in dbs:
+                    for key, value in other.prefixed_db(db.prefix).iterator():
+                        key = db.prefix + key
+                        mine = self.db.get(key)
+                        if mine == value:
+                            continue
+                        if mine is not None:
+                            # Only conjunctive index values, the contexts
+                            # of a triple, differ
+                            value = self._merge_values(key, mine, value)
+                        writes[key] = value
+                        if len(writes) >= self.batch_size:
+                            self.__write_batch(writes)
+                            writes = {}
+                # The namespace bindings whose prefix and namespace are
+                # both unbound here
+                for prefix, namespace in other.prefixed_db(b"namespace").iterator():
+                    if (
+                        self.__namespace.get(prefix) is None
+                        and self.__prefix.get(namespace) is None
+                    ):
+                        writes[self.__namespace.prefix + prefix] = namespace
+                        writes[self.__prefix.prefix + namespace] = prefix
+                if writes:
+                    self.__write_batch(writes)
+                # Terms missing before may not be any more
+                self.__unknown.clear()
+        finally:
+            other.close()
+        self.recount()
+        if self.__bloom is not None:
+            self.rebuild_bloom_filter()
+
+    def rebuild_bloom_filter(self):
+        """
+        Build the Bloom filter from the keys of the first index.
+        """
+        with self.__lock:
+            # A transaction's keys could be rolled back, or its removes
+            # hide keys which would come back
+            assert not self.__pending, "Commit or roll back the transaction first."
+            # Queued writes have keys too
+            self.flush()
+            bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+            for key in self.__indices[0].iterator(include_value=False):
+                bloom.add(key)
+            self.__bloom = bloom
+
+    def compact(self, context=None):
+        """
+        Compact the key ranges of context in LevelDB, or the whole store,
+        dropping the entries (and tombstones) left by removes.
+        """
+        assert self.__open, "The Store must be open."
+        if context is None or context == self:
+            self.__compact(None)
+        else:
+            c = self._term_id(context)
+            if c is not None:
+                self.__compact(c)
+
+    def __compact(self, c):
+        if c is None:
+            self.db.compact_range()
+            return
+        context_prefix = self.__keys.join((c,))
+        for index in self.__indices:
+            prefix = index.prefix + context_prefix
+            self.db.compact_range(start=prefix, stop=_prefix_end(prefix))
+
+    def __schedule_compaction(self):
+        with self.__compaction_lock:
+            if self.__compaction_timer is not None or not self.__compaction_ranges:
+                return
+            delay = 0.0
+            if self.__last_compaction is not None:
+                delay = max(
+                    0.0,
+                    self.__last_compaction
+                    + self.compaction_interval
+                    - time.monotonic(),
+                )
+            self.__compaction_timer = threading.Timer(delay, self.__compact_removed)
+            self.__compaction_timer.daemon = True
+            self.__compaction_timer.start()
+
+    def __compact_removed(self):
+        """
+        The compaction timer: compacts the ranges of the large removes
+        since the last one.
+        """
+        with self.__compaction_lock:
+            ranges = self.__compaction_ranges
+            self.__compaction_ranges = set()
+        if None in ranges:
+            ranges = {None}
+        with self.__compacting:
+            if not self.__open:
+                return
+            try:
+                # The removes may still be queued
+                self.flush()
+                for c in ranges:
+                    self.__compact(c)
+            except Exception:  # pragma: NO COVER
+                logger.exception("Compaction failed")
+        # The timer is only released once the compaction is over (unless
+        # close() cancelled it), so that the large removes made meanwhile
+        # wait for the interval after it
+        with self.__compaction_lock:
+            self.__last_compaction = time.monotonic()
+            if self.__compaction_timer is not threading.current_thread():
+                return
+            self.__compaction_timer = None
+        self.__schedule_compaction()
+
+    def remove_unused_terms(self):
+        """
+        Remove the terms no triple or context uses any more from the term
+        dictionary and compact it, returning the number removed.
+
+        The terms in use are marked by a scan of the first index (and of
+        the contexts), which holds every id in use. Ids freed at the top
+        of the range are allocated again.
+        """
+        assert self.__open, "The Store must be open."
+        keys = self.__keys
+        with self.__lock:
+            # The removes of a transaction could be rolled back
+            assert not self.__pending, "Commit or roll back the transaction first."
+            # Queued writes may use terms too
+            self.flush()
+            used = set()
+            for key in self.__iterator(self.__indices[0], b"", include_value=False):
+                used.update(keys.split(key))
+            used.update(self.__iterator(self.__contexts, b"", include_value=False))
+
+            removed = 0
+            last = 0
+            i2k_prefix = self.__i2k.prefix
+            k2i_prefix = self.__k2i.prefix
+            statistics_prefix = self.__statistics.prefix
+            deletes = {}
+            for i, k in self.__i2k.iterator(include_value=True):
+                if i in used:
+                    last = max(last, keys.number(i))
+                    continue
+                deletes[i2k_prefix + i] = None
+                deletes[k2i_prefix + k] = None
+                deletes[statistics_prefix + i] = None
+                removed += 1
+                if len(deletes) >= self.batch_size:
+                    self.__write_batch(deletes)
+                    deletes = {}
+            if deletes:
+                self.__write_batch(deletes)
+            # The cached ids of the removed terms are no longer valid
+            self.__ids.clear()
+            self.__terms.clear()
+            if self.term_ids == "counter":
+                self._terms = last
+            for prefix in (i2k_prefix, k2i_prefix):
+                self.db.compact_range(start=prefix, stop=_prefix_end(prefix))
+        return removed
+
     def destroy(self, configuration=""):
         assert self.__open is False, "The Store must be closed."
         import os
@@ -278,141 +1343,523 @@ class LevelDBStore(Store):
 
             shutil.rmtree(path)
 
+    def __get(self, db, key):
+        k = db.prefix + key
+        batch = self.__local.batch
+        if batch is not None and k in batch:
+            return batch[k]
+        pending = self.__pending
+        if pending and k in pending:
+            return pending[k]
+        if self.__overlay:
+            written = self.__overlay.get(k)
+            if written is not None:
+                return written[1]
+        return db.get(key)
+
+    def __put(self, db, key, value):
+        batch = self.__local.batch
+        if batch is None:
+            batch = self.__pending
+        if batch is not None:
+            batch[db.prefix + key] = value
+        else:
+            db.put(key, value)
+
+    def __delete(self, db, key):
+        batch = self.__local.batch
+        if batch is None:
+            batch = self.__pending
+        if batch is not None:
+            batch[db.prefix + key] = None
+        else:
+            db.delete(key)
+
+    def __iterator(self, db, prefix, include_value=True):
+        """
+        An iterator over the keys (and values) of db starting with prefix,
+        including any pending writes. The iterator is bounded by prefix,
+        so it ends after the last such key without any checks by callers.
+        """
+        pending = None
+        if self.__pending:
+            # A copy, as other threads add to the transaction. Taken
+            # before the overlay, so that a commit in between is missed
+            # by neither.
+            with self.__lock:
+                pending = dict(self.__pending or ())
+        if self.__overlay:
+            # Taken before the iterator, so that nothing written (and
+            # dropped from the overlay) in between is missed.
+            with self.__overlay_lock:
+                overlay = {k: v for k, (n, v) in self.__overlay.items()}
+            if pending:
+                overlay.update(pending)
+            pending = overlay
+        batch = self.__local.batch
+        if batch:
+            pending = {**pending, **batch} if pending else batch
+        iterator = db.iterator(prefix=prefix, include_value=include_value)
+        if not pending:
+            return iterator
+        return _merge_pending(
+            iterator, pending, db.prefix + prefix, len(db.prefix), include_value
+        )
+
+    def __write(self, pending):
+        if self.__queue is not None:
+            self.__enqueue(pending)
+        else:
+            self.__write_batch(pending)
+
+    def __enqueue(self, pending):
+        if self.__writer_error is not None:
+            raise self.__writer_error
+        if not pending:
+            return
+        with self.__overlay_lock:
+            self.__sequence += 1
+            n = self.__sequence
+            overlay = self.__overlay
+            for key, value in pending.items():
+                overlay[key] = (n, value)
+        # Blocks while the queue is full
+        self.__queue.put((n, pending))
+
+    def __write_behind(self):
+        """
+        The writer thread: writes the queued batches, combining those
+        queued at the same time into one write batch.
+        """
+        waiting = self.__queue
+        overlay = self.__overlay
+        while True:
+            batches = [waiting.get()]
+            size = len(batches[0] or ())
+            while batches[-1] is not None and size < self.batch_size:
+                try:
+                    batches.append(waiting.get_nowait())
+                except queue.Empty:
+                    break
+                size += len(batches[-1] or ())
+            stop = batches[-1] is None
+            written = {}
+            combined = {}
+            for n, pending in batches[:-1] if stop else batches:
+                combined.update(pending)
+                written.update(dict.fromkeys(pending, n))
+            try:
+                if combined:
+                    self.__write_batch(combined)
+            except Exception as e:  # pragma: NO COVER
+                logger.exception("Write-behind failed")
+                self.__writer_error = e
+            else:
+                with self.__overlay_lock:
+                    for key, n in written.items():
+                        if overlay.get(key, (None,))[0] == n:
+                            del overlay[key]
+            for _ in batches:
+                waiting.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """
+        Wait until the writes queued for the write-behind thread have
+        been written.
+        """
+        if self.__queue is not None:
+            self.__queue.join()
+        if self.__writer_error is not None:
+            raise self.__writer_error
+
+    def __write_batch(self, pending):
+        with self.db.write_batch(sync=self.durability == "sync") as wb:
+            for key, value in pending.items():
+                if value is None:
+                    wb.delete(key)
+                else:
+                    wb.put(key, value)
+        if self.durability == "group":
+            self.__written()
+
+    def __written(self):
+        with self.__sync_lock:
+            self.__unsynced += 1
+            due = self.__unsynced >= self.group_commit_size
+            if not due and self.__sync_timer is None:
+                self.__sync_timer = threading.Timer(
+                    self.group_commit_interval, self.sync
+                )
+                self.__sync_timer.daemon = True
+                self.__sync_timer.start()
+        if due:
+            self.sync()
+
+    def sync(self):
+        """
+        Make all the writes so far durable, by syncing LevelDB's log.
+        """
+        with self.__sync_lock:
+            if self.__sync_timer is not None:
+                self.__sync_timer.cancel()
+                self.__sync_timer = None
+            self.__unsynced = 0
+            if self.__open:
+                # An empty synced batch syncs the log, and with it all
+                # the writes before it
+                self.db.write_batch(sync=True).write()
+
+    @contextmanager
+    def __batch(self):
+        """
+        Collect the writes made in the block into a single write batch,
+        or into the open transaction if there is one. Other threads see
+        none of them before the block ends. Callers hold the store lock.
+        """
+        local = self.__local
+        if local.batch is not None:
+            yield
+            return
+        local.batch = batch = {}
+        try:
+            yield
+            if self.__pending is not None:
+                self.__pending.update(batch)
+            else:
+                self.__write(batch)
+        finally:
+            local.batch = None
+
+    def commit(self):
+        """
+        Write the pending transaction to LevelDB in a single write batch.
+        """
+        with self.__lock:
+            if self.__pending:
+                self.__write(self.__pending)
+            if self.transactional:
+                self.__pending = {}
+        self.__schedule_compaction()
+
+    def rollback(self):
+        """
+        Discard the pending transaction.
+        """
+        with self.__lock:
+            if self.transactional:
+                self.__pending = {}
+                with self.__compaction_lock:
+                    self.__compaction_ranges = set()
+
     def add(self, triple, context, quoted=False):
         """
         Add a triple to the store of triples.
         """
-        (subject, predicate, object) = triple
         assert self.__open, "The Store must be open."
         assert context != self, "Can not add triple directly to store"
         # Add the triple to the Store, triggering TripleAdded events
-        Store.add(self, (subject, predicate, object), context, quoted)
+        # (if anything subscribes to them)
+        if self.dispatcher.get_map():
+            Store.add(self, triple, context, quoted)
+        with self.__lock, self.__batch():
+            self.__add(triple, context, quoted)
+
+    def addN(self, quads):
+        """
+        Add a sequence of quads, writing the index entries of each
+        ``batch_size`` quads to LevelDB in a single write batch.
 
+        Quads repeated within a batch are only written once.
+        """
+        assert self.__open, "The Store must be open."
+        for batch in _chunks(quads, self.batch_size):
+            dispatch = bool(self.dispatcher.get_map())
+            with self.__lock, self.__batch():
+                for s, p, o, c in batch:
+                    assert (
+                        c is not None
+                    ), f"Context associated with {s} {p} {o} is None!"
+                    if dispatch:
+                        Store.add(self, (s, p, o), c, False)
+                    self.__add((s, p, o), c, False)
+
+    def __add(self, triple, context, quoted):
+        (subject, predicate, object) = triple
         _to_string = self._to_string
 
-        s = _to_string(subject)
-        p = _to_string(predicate)
-        o = _to_string(object)
+        spo = (_to_string(subject), _to_string(predicate), _to_string(object))
         c = _to_string(context)
 
-        cspo, cpos, cosp = self.__indices
+        keys = self.__keys
+        cspo = self.__indices[0]
+        cspo_to_key = self.__indices_info[0][1]
 
-        value = cspo.get(f"{c}^{s}^{p}^{o}^".encode())
+        _get = self.__get
+        _put = self.__put
+        bloom = self.__bloom
 
-        if value is None:
-            self.__contexts.put(c.encode(), b"")
+        key = cspo_to_key(spo, c)
+        if bloom is not None and key not in bloom:
+            value = None  # certainly new
+        else:
+            value = _get(cspo, key)
 
-            contexts_value = cspo.get(
-                f"{''}^{s}^{p}^{o}^".encode()
-            ) or "".encode("latin-1")
+        if value is None:
+            _put(self.__contexts, c, b"")
 
-            contexts = set(contexts_value.split("^".encode("latin-1")))
-            contexts.add(c.encode())
+            conjunctive_key = cspo_to_key(spo, keys.conjunctive)
+            if bloom is not None:
+                bloom.add(key)
+                if conjunctive_key not in bloom:
+                    contexts_value = None
+                else:
+                    contexts_value = _get(cspo, conjunctive_key)
+                if not quoted:
+                    bloom.add(conjunctive_key)
+            else:
+                contexts_value = _get(cspo, conjunctive_key)
 
-            contexts_value = "^".encode("latin-1").join(contexts)
-            assert contexts_value is not None
+            self.__count(c, 1)
+            if not quoted and contexts_value is None:
+                self.__count_triple(spo[1], 1)
 
-            cspo.put(f"{c}^{s}^{p}^{o}^".encode(), b"")
-            cpos.put(f"{c}^{p}^{o}^{s}^".encode(), b"")
-            cosp.put(f"{c}^{o}^{s}^{p}^".encode(), b"")
             if not quoted:
-                cspo.put(f"^{s}^{p}^{o}^".encode(), contexts_value)
-                cpos.put(f"^{p}^{o}^{s}^".encode(), contexts_value)
-                cosp.put(f"^{o}^{s}^{p}^".encode(), contexts_value)
+                for i, _to_key, _from_key in self.__graph_indices_info:
+                    _put(i, _to_key(spo, c), b"")
+            if self.__membership is not None:
+                # The conjunctive keys only need writing for a new triple
+                conjunctive = not quoted and contexts_value is None
+                contexts_value = b""
+            else:
+                contexts = set(keys.split_contexts(contexts_value or b""))
+                contexts.add(c)
+                contexts_value = keys.join_contexts(contexts)
+                conjunctive = not quoted
+
+            for i, _to_key, _from_key in self.__indices_info:
+                _put(i, _to_key(spo, c), b"")
+                if conjunctive:
+                    _put(i, _to_key(spo, keys.conjunctive), contexts_value)
 
             # self.__needs_sync = True
 
         else:
             pass  # already have this triple, ignoring")
 
+    def _bulk_entries(self, quads, pickled=False):
+        """
+        Yields, in no particular order, the (key, value) entries of the
+        underlying db that adding each of quads, given as (s, p, o,
+        context identifier), to this (empty) store would write.
+
+        With pickled set, the quads are instead (s, p, o, context graph)
+        already serialized by a LevelDBStore of the same term format.
+
+        Term ids are allocated in memory rather than looked up in the
+        term dictionary, and triples are not checked for existence, so
+        the same key may be yielded more than once: use _merge_values
+        to combine the values of duplicate keys.
+        """
+        assert self.__open, "The Store must be open."
+        from rdflib.graph import Graph
+
+        dumps = self._dumps
+        loads = self._loads
+        inline = self.__inline
+        keys = self.__keys
+        i2k_prefix = self.__i2k.prefix
+        k2i_prefix = self.__k2i.prefix
+        contexts_prefix = self.__contexts.prefix
+        indices_info = self.__indices_info
+        membership = self.__membership
+        graph_indices_info = self.__graph_indices_info
+        hashed = self.term_ids == "hash"
+        ids = {}
+        # The serialized terms of the hash ids
+        hashes = {}
+        entries = []
+
+        def term_id(term):
+            i = ids.get(term)
+            if i is None:
+                if inline:
+                    i = inline_id(loads(term) if pickled else term)
+                    if i is not None:
+                        ids[term] = i
+                        return i
+                k = term if pickled else dumps(term)
+                if hashed:
+                    attempt = 0
+                    i = keys.id(term_hash(k))
+                    while i == keys.conjunctive or hashes.setdefault(i, k) != k:
+                        attempt += 1
+                        i = keys.id(term_hash(k, attempt))
+                    ids[term] = i
+                else:
+                    self._terms += 1
+                    i = ids[term] = keys.id(self._terms)
+                entries.append((i2k_prefix + i, k))
+                entries.append((k2i_prefix + k, i))
+            return i
+
+        graphs = {}
+        for subject, predicate, object, context in quads:
+            if not pickled:
+                identifier = context
+                context = graphs.get(identifier)
+                if context is None:
+                    context = graphs[identifier] = Graph(self, identifier)
+            spo = (term_id(subject), term_id(predicate), term_id(object))
+            c = term_id(context)
+            entries.append((contexts_prefix + c, b""))
+            for i, _to_key, _from_key in graph_indices_info:
+                entries.append((i.prefix + _to_key(spo, c), b""))
+            if membership is not None:
+                contexts_value = b""
+            else:
+                contexts_value = c
+            for i, _to_key, _from_key in indices_info:
+                entries.append((i.prefix + _to_key(spo, c), b""))
+                entries.append(
+                    (i.prefix + _to_key(spo, keys.conjunctive), contexts_value)
+                )
+            yield from entries
+            entries.clear()
+
+        if not hashed:
+            self.__terms_leased = self._terms
+            yield (k2i_prefix + b"__terms__", str(self._terms).encode())
+
+    def _merge_values(self, key, value, other):
+        """
+        Combines two values written by _bulk_entries for the same key.
+        """
+        if value == other:
+            return value
+        # Only the conjunctive index values, the contexts of the triple,
+        # can differ.
+        keys = self.__keys
+        contexts = set(keys.split_contexts(value))
+        contexts.update(keys.split_contexts(other))
+        return keys.join_contexts(contexts)
+
     def __remove(self, spo, c, quoted=False):
-        s, p, o = spo
-        cspo, cpos, cosp = self.__indices
-        contexts_value = (
-            cspo.get(
-                "^".encode("latin-1").join(
-                    ["".encode("latin-1"), s, p, o, "".encode("latin-1")]
-                ),
-            )
-            or "".encode("latin-1")
-        )
-        contexts = set(contexts_value.split("^".encode("latin-1")))
-        contexts.discard(c)
-        contexts_value = "^".encode("latin-1").join(contexts)
+        keys = self.__keys
+        cspo = self.__indices[0]
         for i, _to_key, _from_key in self.__indices_info:
-            i.delete(_to_key((s, p, o), c))
-        if not quoted:
-            if contexts_value:
+            self.__delete(i, _to_key(spo, c))
+        self.__count(c, -1)
+        if quoted:
+            return
+        for i, _to_key, _from_key in self.__graph_indices_info:
+            self.__delete(i, _to_key(spo, c))
+        conjunctive_key = self.__indices_info[0][1](spo, keys.conjunctive)
+        if self.__membership is not None:
+            # The conjunctive keys stay for as long as the triple is in
+            # any other context
+            if next(self.__member_contexts(spo), None) is None:
+                if self.__get(cspo, conjunctive_key) is not None:
+                    self.__count_triple(spo[1], -1)
                 for i, _to_key, _from_key in self.__indices_info:
-                    i.put(
-                        _to_key((s, p, o), "".encode("latin-1")),
-                        contexts_value,
-                    )
+                    self.__delete(i, _to_key(spo, keys.conjunctive))
+            return
+        contexts_value = self.__get(cspo, conjunctive_key)
+        if contexts_value is None:
+            return  # only ever in quoted contexts
+        contexts = set(keys.split_contexts(contexts_value))
+        contexts.discard(c)
+        contexts_value = keys.join_contexts(contexts)
+        if contexts_value:
+            for i, _to_key, _from_key in self.__indices_info:
+                self.__put(i, _to_key(spo, keys.conjunctive), contexts_value)
 
-            else:
-                for i, _to_key, _from_key in self.__indices_info:
-                    try:
-                        i.delete(_to_key((s, p, o), "".encode("latin-1")))
-                    except Exception:
-                        pass  # FIXME okay to ignore these?
+        else:
+            for i, _to_key, _from_key in self.__indices_info:
+                self.__delete(i, _to_key(spo, keys.conjunctive))
+            self.__count_triple(spo[1], -1)
 
     def remove(self, spo, context):
         subject, predicate, object = spo
         assert self.__open, "The Store must be open."
         # Add the triple to the Store, triggering TripleRemoved events
-        Store.remove(self, (subject, predicate, object), context)
-        _to_string = self._to_string
+        # (if anything subscribes to them)
+        if self.dispatcher.get_map():
+            Store.remove(self, (subject, predicate, object), context)
+        with self.__lock:
+            removed = self.__remove_matching((subject, predicate, object), context)
+            threshold = self.compaction_threshold
+            if threshold is not None and removed and removed >= threshold:
+                if context is None or context == self:
+                    c = None
+                else:
+                    c = self._term_id(context)
+                with self.__compaction_lock:
+                    self.__compaction_ranges.add(c)
+                # In a transaction, once the removes are committed
+                if not self.transactional:
+                    self.__schedule_compaction()
+
+    def __remove_matching(self, spo, context):
+        """
+        Remove the triples matching spo in context, returning how many
+        index entries matched.
+        """
+        subject, predicate, object = spo
 
         if context is not None:
             if context == self:
                 context = None
 
+        ids = self.__resolve(spo, context)
+        if ids is None:
+            return 0
+
         if (
             subject is not None
             and predicate is not None
             and object is not None
             and context is not None
         ):
-            s = _to_string(subject)
-            p = _to_string(predicate)
-            o = _to_string(object)
-            c = _to_string(context)
-            value = self.__indices[0].get(f"{c}^{s}^{p}^{o}^".encode())
-            if value is not None:
-                self.__remove((s.encode(), p.encode(), o.encode()), c.encode())
+            spo, c = ids[:3], ids[3]
+            with self.__batch():
+                value = self.__get(self.__indices[0], self.__indices_info[0][1](spo, c))
+                if value is not None:
+                    self.__remove(spo, c)
 
-                # self.__needs_sync = True
+                    # self.__needs_sync = True
+                    return 1
+            return 0
 
         else:
-            cspo, cpos, cosp = self.__indices
-            index, prefix, from_key, results_from_key = self.__lookup(
-                (subject, predicate, object), context
+            index, prefix, from_key, results_from_key, matches = self.__lookup(
+                ids[:3], ids[3]
             )
-            for key in index.iterator(start=prefix, include_value=False):
-                if key.startswith(prefix):
-                    c, s, p, o = from_key(key)
+            matching = self.__iterator(index, prefix, include_value=True)
+            if matches is not None:
+                matching = (item for item in matching if matches(item[0]))
+            # The matching triples are removed batch_size at a time, each
+            # chunk in one write batch (or into the open transaction). The
+            # iterator reads a snapshot, so it doesn't see the deletes.
+            removed = 0
+            for chunk in _chunks(matching, self.batch_size):
+                removed += len(chunk)
+                with self.__batch():
                     if context is None:
-                        contexts_value = index.get(key) or "".encode("latin-1")
-                        # remove triple from all non quoted contexts
-                        contexts = set(
-                            contexts_value.split("^".encode("latin-1"))
-                        )
-                        # and from the conjunctive index
-                        contexts.add("".encode("latin-1"))
-                        for c in contexts:
-                            for i, _to_key, _ in self.__indices_info:
-                                i.delete(_to_key((s, p, o), c))
+                        self.__remove_everywhere(chunk, from_key)
                     else:
-                        self.__remove((s, p, o), c)
-                else:
-                    break
+                        for key, value in chunk:
+                            c, s, p, o = from_key(key)
+                            self.__remove((s, p, o), c)
 
             if context is not None:
                 if subject is None and predicate is None and object is None:
                     # TODO: also if context becomes empty and not just on
                     # remove((None, None, None), c)
                     try:
-                        self.__contexts.delete(_to_string(context).encode())
+                        with self.__batch():
+                            self.__delete(self.__contexts, ids[3])
                     except Exception as e:  # pragma: NO COVER
                         print(
                             "%s, Failed to delete %s" % (e, context)
@@ -420,6 +1867,32 @@ class LevelDBStore(Store):
                         pass  # pragma: NO COVER
 
             # self.__needs_sync = needs_sync
+            return removed
+
+    def __remove_everywhere(self, entries, from_key):
+        """
+        Delete the triples of the conjunctive index entries from all the
+        contexts they are in, and from the conjunctive index.
+        """
+        keys = self.__keys
+        graph_indices_info = self.__graph_indices_info
+        for key, contexts_value in entries:
+            c, s, p, o = from_key(key)
+            # remove triple from all non quoted contexts
+            if self.__membership is not None:
+                contexts = set(self.__member_contexts((s, p, o)))
+            else:
+                contexts = set(keys.split_contexts(contexts_value))
+            for c in contexts:
+                for i, _to_key, _ in graph_indices_info:
+                    self.__delete(i, _to_key((s, p, o), c))
+                self.__count(c, -1)
+            # and from the conjunctive index
+            contexts.add(keys.conjunctive)
+            for c in contexts:
+                for i, _to_key, _ in self.__indices_info:
+                    self.__delete(i, _to_key((s, p, o), c))
+            self.__count_triple(p, -1)
 
     def triples(self, spo, context=None):
         """A generator over all the triples matching"""
@@ -431,16 +1904,90 @@ class LevelDBStore(Store):
             if context == self:
                 context = None
 
+        ids = self.__resolve(spo, context)
+        if ids is None:
+            # A bound term was never added, nothing can match
+            return
+
+        if context is None and self.__graph_lookup_dict:
+            graph_lookup = self.__graph_lookup(ids[:3])
+            if graph_lookup is not None:
+                yield from self.__graph_triples(*graph_lookup)
+                return
+
         # _from_string = self._from_string ## UNUSED
-        index, prefix, from_key, results_from_key = self.__lookup(
-            (subject, predicate, object), context
+        index, prefix, from_key, results_from_key, matches = self.__lookup(
+            ids[:3], ids[3]
         )
 
-        for key, value in index.iterator(start=prefix, include_value=True):
-            if key.startswith(prefix):
-                yield results_from_key(key, subject, predicate, object, value)
-            else:
-                break
+        iterator = self.__iterator(index, prefix, include_value=True)
+        if matches is not None:
+            iterator = ((key, value) for key, value in iterator if matches(key))
+        # The batches grow from a single result, so that callers wanting
+        # only the first few don't pay for decoding a whole batch
+        size = 1
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            terms = self.__decode(batch, from_key, (subject, predicate, object))
+            for key, value in batch:
+                yield results_from_key(
+                    key, subject, predicate, object, value, terms.__getitem__
+                )
+            size = min(size * 2, self.decode_batch_size)
+
+    def __decode(self, batch, from_key, spo):
+        """
+        The terms of the ids in the unbound positions of the keys of
+        batch. Each distinct id is decoded once, in id order, so that the
+        term dictionary reads of the cache misses land near each other.
+        """
+        unbound = [n + 1 for n, term in enumerate(spo) if term is None]
+        ids = set()
+        for key, value in batch:
+            parts = from_key(key)
+            ids.update(parts[n] for n in unbound)
+        _from_string = self._from_string
+        return {i: _from_string(i) for i in sorted(ids)}
+
+    def __graph_lookup(self, spo):
+        """
+        The graph-last index, prefix and from_key function for the
+        triples matching spo (term ids, None where unbound) in all
+        contexts, if an index has keys starting with all the bound terms.
+        """
+        i = sum(1 << n for n, term in enumerate(spo) if term is not None)
+        lookup = self.__graph_lookup_dict.get(i)
+        if lookup is None:
+            return None
+        index, to_key, from_key = lookup
+        return index, to_key.prefix(spo), from_key
+
+    def __graph_triples(self, index, prefix, from_key):
+        """
+        Yields the triples of the graph-last index keys starting with
+        prefix, each with its contexts: the keys of a triple are adjacent.
+        """
+        _from_string = self._from_string
+        spo = None
+        contexts = []
+        for key in self.__iterator(index, prefix, include_value=False):
+            s, p, o, c = from_key(key)
+            if (s, p, o) != spo:
+                if spo is not None:
+                    yield (
+                        tuple(_from_string(term) for term in spo),
+                        (_from_string(c) for c in contexts),
+                    )
+                spo = (s, p, o)
+                contexts = []
+            contexts.append(c)
+        if spo is not None:
+            yield (
+                tuple(_from_string(term) for term in spo),
+                (_from_string(c) for c in contexts),
+            )
 
     def __len__(self, context=None):
         assert self.__open, "The Store must be open."
@@ -449,28 +1996,196 @@ class LevelDBStore(Store):
                 context = None
 
         if context is None:
-            prefix = "^".encode("latin-1")
+            c = self.__keys.conjunctive
+        else:
+            c = self._term_id(context)
+            if c is None:
+                return 0
+
+        if self.__counted:
+            count = self.__get(self.__counts, c)
+            return 0 if count is None else int(count)
+
+        prefix = self.__keys.join((c,))
+        return sum(
+            1 for key in self.__iterator(self.__indices[0], prefix, include_value=False)
+        )
+
+    def __count(self, c, n, counts=None):
+        "Adds n to the number of triples in context (id) c, or in counts"
+        if not self.__counted:
+            return
+        if counts is None:
+            counts = self.__counts
+        count = self.__get(counts, c)
+        count = n if count is None else int(count) + n
+        if count:
+            self.__put(counts, c, str(count).encode())
         else:
-            prefix = f"{self._to_string(context)}^".encode()
+            self.__delete(counts, c)
 
-        return len(
-            [
-                key
-                for key in self.__indices[0].iterator(
-                    start=prefix, include_value=False
+    def __count_triple(self, p, n):
+        """
+        Adds n to the number of triples in the conjunctive graph, and of
+        those of predicate (id) p
+        """
+        self.__count(self.__keys.conjunctive, n)
+        self.__count(p, n, self.__predicates)
+
+    def recount(self):
+        """
+        Count the triples in each context, and in the conjunctive graph
+        and of each predicate there, from the keys of the first index and
+        write the counts, which are then kept up to date. Stores created
+        before the counts were kept need this once.
+        """
+        assert self.__open, "The Store must be open."
+        conjunctive = self.__keys.conjunctive
+        from_key = self.__indices_info[0][2]
+        with self.__lock:
+            assert not self.__pending, "Commit or roll back the transaction first."
+            self.flush()
+            counts = {}
+            predicates = {}
+            for key in self.__indices[0].iterator(include_value=False):
+                c, s, p, o = from_key(key)
+                counts[c] = counts.get(c, 0) + 1
+                if c == conjunctive:
+                    predicates[p] = predicates.get(p, 0) + 1
+            writes = {}
+            for db, found in ((self.__counts, counts), (self.__predicates, predicates)):
+                prefix = db.prefix
+                for c in db.iterator(include_value=False):
+                    writes[prefix + c] = None
+                for c, count in found.items():
+                    writes[prefix + c] = str(count).encode()
+            writes[self.__meta.prefix + b"counted"] = b"1"
+            self.__write_batch(writes)
+            self.__counted = True
+
+    def rebuild_statistics(self):
+        """
+        Count the triples of each predicate, and their distinct subjects
+        and objects, in the conjunctive graph and write the statistics
+        estimate() uses, replacing any earlier ones. The number of
+        triples of each predicate is kept up to date by writes (in
+        counted stores), estimates scale the others by it.
+        """
+        assert self.__open, "The Store must be open."
+        conjunctive = self.__keys.join((self.__keys.conjunctive,))
+        with self.__lock:
+            self.flush()
+            counts = {}
+            distinct = {0: {}, 2: {}}
+            for position, found in distinct.items():
+                # An index whose keys start with the predicate and the
+                # subject (or object) has the keys of each pair adjacent,
+                # otherwise the pairs are collected in a set.
+                for n, order in enumerate(self.__orders):
+                    if set(order[:2]) == {1, position}:
+                        break
+                else:
+                    n = None
+                index, _to_key, from_key = self.__indices_info[0 if n is None else n]
+                pairs = set()
+                last = None
+                for key in index.iterator(prefix=conjunctive, include_value=False):
+                    ids = from_key(key)
+                    pair = ids[2], ids[position + 1]
+                    if position == 0:
+                        counts[pair[0]] = counts.get(pair[0], 0) + 1
+                    if n is None:
+                        pairs.add(pair)
+                    elif pair != last:
+                        found[pair[0]] = found.get(pair[0], 0) + 1
+                        last = pair
+                for p, term in pairs:
+                    found[p] = found.get(p, 0) + 1
+
+            prefix = self.__statistics.prefix
+            writes = {
+                prefix + p: None
+                for p in self.__statistics.iterator(include_value=False)
+            }
+            for p, count in counts.items():
+                writes[prefix + p] = b"%d %d %d" % (
+                    count,
+                    distinct[0][p],
+                    distinct[2][p],
                 )
-                if key.startswith(prefix)
-            ]
+            self.__write_batch(writes)
+
+    def estimate(self, spo, context=None, limit=1000):
+        """
+        The number of triples expected to match spo in context (or in all
+        contexts). Key ranges are counted up to limit keys, and estimated
+        from their approximate size beyond that.
+        """
+        assert self.__open, "The Store must be open."
+        subject, predicate, object = spo
+        if context is not None and context == self:
+            context = None
+        if subject is None and predicate is None and object is None:
+            return self.__len__(context)
+
+        ids = self.__resolve(spo, context)
+        if ids is None:
+            return 0
+
+        if context is None and predicate is not None:
+            statistics = self.__statistics.get(ids[1])
+            if self.__counted:
+                count = self.__get(self.__predicates, ids[1])
+                count = 0 if count is None else int(count)
+                if (subject is None and object is None) or not count:
+                    return count
+            if statistics is not None:
+                built, subjects, objects = map(int, statistics.split())
+                if not self.__counted:
+                    count = built
+                if subject is None and object is None:
+                    return count
+                # The distinct subjects (objects) are taken to have grown
+                # or shrunk with the triples since the statistics were
+                # built: subjects * count / built of them, each with
+                # built / subjects triples.
+                if object is None:
+                    return min(count, max(1, round(built / subjects)))
+                if subject is None:
+                    return min(count, max(1, round(built / objects)))
+
+        index, prefix, from_key, results_from_key, matches = self.__lookup(
+            ids[:3], ids[3]
         )
+        count = 0
+        for key in self.__iterator(index, prefix, include_value=False):
+            if matches is None or matches(key):
+                count += 1
+                if count >= limit:
+                    break
+        else:
+            return count
+
+        # Scale the approximate size of the range by that of the keys
+        # of the conjunctive graph in the same index
+        start = index.prefix + prefix
+        size = self.db.approximate_size(start, _prefix_end(start))
+        start = index.prefix + self.__keys.join((self.__keys.conjunctive,))
+        total = self.db.approximate_size(start, _prefix_end(start))
+        if not size or not total:
+            # Too recently written to be sized
+            return count
+        return max(count, round(size / total * self.__len__()))
 
     def bind(self, prefix, namespace):
         prefix = prefix.encode("utf-8")
         namespace = namespace.encode("utf-8")
+        sync = self.durability == "sync"
         bound_prefix = self.__prefix.get(namespace)
         if bound_prefix:
-            self.__namespace.delete(bound_prefix)
-        self.__prefix.put(namespace, prefix)
-        self.__namespace.put(prefix, namespace)
+            self.__namespace.delete(bound_prefix, sync=sync)
+        self.__prefix.put(namespace, prefix, sync=sync)
+        self.__namespace.put(prefix, namespace, sync=sync)
 
     def namespace(self, prefix):
         prefix = prefix.encode("utf-8")
@@ -493,7 +2208,16 @@ class LevelDBStore(Store):
         ]:
             yield prefix, URIRef(namespace)
 
-    @lru_cache(maxsize=5000)
+    def __member_contexts(self, spo):
+        """
+        Yields the context ids of a triple (of term ids) from the first
+        graph-last (or membership) index, including any pending writes.
+        """
+        index, to_key, from_key = self.__graph_indices_info[0]
+        prefix = to_key(spo)
+        for key in self.__iterator(index, prefix, include_value=False):
+            yield from_key(key)[3]
+
     def __get_context(self, ident):
         logger.debug(f"get context {ident}")
         return self.__contexts.get(ident, {})
@@ -506,83 +2230,181 @@ class LevelDBStore(Store):
 
     def contexts(self, triple=None):
         _from_string = self._from_string
-        _to_string = self._to_string
 
         if triple:
-            s, p, o = triple
-            s = _to_string(s)
-            p = _to_string(p)
-            o = _to_string(o)
-            contexts = self.__indices[0].get(f"^{s}^{p}^{o}^".encode())
+            spo = self.__resolve(triple, None)
+            if spo is None:
+                return
+            spo = spo[:3]
+            if self.__graph_indices_info:
+                for c in self.__member_contexts(spo):
+                    yield _from_string(c)
+                return
+            contexts = self.__get(
+                self.__indices[0],
+                self.__indices_info[0][1](spo, self.__keys.conjunctive),
+            )
 
             if contexts:
-                for c in contexts.split("^".encode("latin-1")):
-                    if c:
-                        yield _from_string(c)
+                for c in self.__keys.split_contexts(contexts):
+                    yield _from_string(c)
 
         else:
-            for k in self.__contexts.iterator(include_value=False):
+            for k in self.__iterator(self.__contexts, b"", include_value=False):
                 yield _from_string(k)
 
-    @lru_cache(maxsize=5000)
     def add_graph(self, graph):
-        self.__contexts.put(self._to_string(graph).encode(), b"")
+        with self.__lock, self.__batch():
+            self.__put(self.__contexts, self._to_string(graph), b"")
 
     def remove_graph(self, graph):
         self.remove((None, None, None), graph)
 
-    @lru_cache(maxsize=5000)
+    def term_cache_info(self):
+        """
+        The hits, misses and number of entries of the caches of term ids
+        ("ids"), of terms ("terms") and of terms without ids ("unknown").
+        """
+        return {
+            "ids": self.__ids.info(),
+            "terms": self.__terms.info(),
+            "unknown": self.__unknown.info(),
+        }
+
+    def _term_id(self, term):
+        """
+        term id from rdflib term, or None if the term has none: unlike
+        _to_string, which allocates ids, this only reads.
+        """
+        i = self.__ids.get(term)
+        if i is not None:
+            return i
+        if self.__inline:
+            i = inline_id(term)
+            if i is not None:
+                return i
+        if self.__unknown.get(term) is not None:
+            return None
+        k = self._dumps(term)
+        # Unless _to_string allocates an id for term, or
+        # remove_unused_terms frees it, in the meantime
+        with self.__lock:
+            i = self.__k2i.get(k)
+            if i is None:
+                self.__unknown.put(term, True)
+                return None
+            self.__ids.put(term, i)
+        return i
+
+    def __resolve(self, spo, context):
+        """
+        The ids of the terms of spo and of context, None where unbound,
+        or None if a bound term has no id, as nothing can match it.
+        """
+        _term_id = self._term_id
+        ids = []
+        for term in (*spo, context):
+            if term is None:
+                ids.append(None)
+            else:
+                i = _term_id(term)
+                if i is None:
+                    return None
+                ids.append(i)
+        return ids
+
     def _from_string(self, i):
         """
-        rdflib term from index number (as a string)
+        rdflib term from term id
         """
-        k = self.__i2k.get(str(int(i)).encode())
+        val = self.__terms.get(i)
+        if val is not None:
+            return val
+        if self.__inline and i[0] & INLINE:
+            val = inline_term(i)
+            self.__terms.put(i, val)
+            return val
+        k = self.__i2k.get(i)
         if k is not None:
             val = self._loads(k)
+            self.__terms.put(i, val)
             return val
         else:
             raise Exception(f"Key for {i} is None")
 
-    @lru_cache(maxsize=5000)
     def _to_string(self, term):
         """
-        index number (as a string) from rdflib term
+        term id (bytes, in the store's key format) from rdflib term
         """
+        i = self.__ids.get(term)
+        if i is not None:
+            return i
+        if self.__inline:
+            i = inline_id(term)
+            if i is not None:
+                return i
         k = self._dumps(term)
         i = self.__k2i.get(k)
 
         if i is None:  # (from BdbApi)
-            # Does not yet exist, increment refcounter and create
-            self._terms += 1
-            i = str(self._terms)
-            self.__i2k.put(i.encode(), k)
-            self.__k2i.put(k, i.encode())
-            self.__k2i.put(b"__terms__", str(self._terms).encode())
-        else:
-            i = i.decode()
+            with self.__lock:
+                i = self.__k2i.get(k)
+                if i is None:
+                    if self.term_ids == "hash":
+                        i = self.__hash_id(k)
+                    else:
+                        # Does not yet exist, increment refcounter and create
+                        self._terms += 1
+                        if self._terms > self.__terms_leased:
+                            self.__terms_leased = self._terms + self.term_block_size - 1
+                            self.__k2i.put(
+                                b"__terms__", str(self.__terms_leased).encode()
+                            )
+                        i = self.__keys.id(self._terms)
+                    self.__i2k.put(i, k)
+                    self.__k2i.put(k, i)
+                    self.__unknown.discard(term)
+        self.__ids.put(term, i)
+        return i
+
+    def __hash_id(self, k):
+        """
+        The hash id of the new serialized term k, hashed again while the
+        id is taken by another term (or is the conjunctive context's).
+        """
+        keys = self.__keys
+        attempt = 0
+        i = keys.id(term_hash(k))
+        while i == keys.conjunctive or self.__i2k.get(i) is not None:
+            attempt += 1
+            i = keys.id(term_hash(k, attempt))
         return i
 
     def __lookup(self, spo, context):
+        """
+        The index, key prefix, key decoders and residual filter for the
+        triples matching spo in context, given as term ids.
+        """
         subject, predicate, object = spo
-        _to_string = self._to_string
-        if context is not None:
-            context = _to_string(context)
         i = 0
         if subject is not None:
             i += 1
-            subject = _to_string(subject)
         if predicate is not None:
             i += 2
-            predicate = _to_string(predicate)
         if object is not None:
             i += 4
-            object = _to_string(object)
-        index, prefix_func, from_key, results_from_key = self.__lookup_dict[i]
+        (
+            index,
+            prefix_func,
+            from_key,
+            results_from_key,
+            residual,
+        ) = self.__lookup_dict[i]
         # DEBUG
         try:
-            prefix = "^".join(
-                prefix_func((subject, predicate, object), context)
-            ).encode("utf-8")
+            prefix = self.__keys.join(
+                tuple(prefix_func((subject, predicate, object), context))
+            )
         except Exception as e:
             raise Exception(
                 "{}: {} {} - {} {} - {} {} - {} {}".format(
@@ -597,64 +2419,184 @@ class LevelDBStore(Store):
                     type(context),
                 )
             )
-        return index, prefix, from_key, results_from_key
+        if residual:
+            split = self.__keys.split
+            bound = (subject, predicate, object)
+            terms = tuple((k, bound[position]) for k, position in residual)
+
+            def matches(key):
+                parts = split(key)
+                return all(parts[k] == term for k, term in terms)
+
+        else:
+            matches = None
+        return index, prefix, from_key, results_from_key, matches
+
+
+def _chunks(iterable, size):
+    "Yields successive lists of at most size items from iterable"
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
-def to_key_func(i):
+def _prefix_end(prefix):
+    "The first key after all the keys starting with prefix"
+    prefix = prefix.rstrip(b"\xff")
+    return prefix[:-1] + bytes((prefix[-1] + 1,))
+
+
+def _merge_pending(iterator, pending, prefix, offset, include_value):
+    """
+    Merges the pending writes whose (full) key starts with prefix into
+    a plyvel iterator, in key order. Keys are yielded with the first
+    offset bytes (the prefixed db's prefix) removed.
+    """
+    overlay = sorted(
+        (key[offset:], value)
+        for key, value in pending.items()
+        if key.startswith(prefix)
+    )
+    i = 0
+    for item in iterator:
+        key = item[0] if include_value else item
+        while i < len(overlay) and overlay[i][0] <= key:
+            okey, ovalue = overlay[i]
+            i += 1
+            if ovalue is not None:
+                yield (okey, ovalue) if include_value else okey
+            if okey == key:
+                break
+        else:
+            yield item
+    for okey, ovalue in overlay[i:]:
+        if ovalue is not None:
+            yield (okey, ovalue) if include_value else okey
+
+
+def permutation(i):
+    """
+    The positions (0 for the subject, 1 the predicate and 2 the object)
+    of the terms of a triple in the keys of an index, given as a string
+    such as "pos", as the number of a cyclic index ("spo", "pos", "osp")
+    or as the positions themselves.
+    """
+    if isinstance(i, int):
+        return (i % 3, (i + 1) % 3, (i + 2) % 3)
+    if isinstance(i, str):
+        return tuple("spo".index(term) for term in i)
+    return tuple(i)
+
+
+def to_key_func(i, keys=DecimalKeys):
+    first, second, third = permutation(i)
+    join = keys.join
+
     def to_key(triple, context):
-        "Takes a string; returns key"
-        return "^".encode("latin-1").join(
-            (
-                context,
-                triple[i % 3],
-                triple[(i + 1) % 3],
-                triple[(i + 2) % 3],
-                "".encode("latin-1"),
-            )
-        )  # "" to tac on the trailing ^
+        "Takes a triple of term ids and a context id; returns key"
+        return join((context, triple[first], triple[second], triple[third]))
+
+    return to_key
+
+
+def graph_key_func(i, keys=DecimalKeys):
+    """
+    The to_key function of a graph-last index, whose keys are the terms
+    of a triple in the order of permutation(i) followed by the context.
+    Without a context it returns the triple's prefix of those keys, and
+    its prefix(triple) the prefix of the leading terms that are not None.
+    """
+    order = permutation(i)
+    first, second, third = order
+    join = keys.join
+
+    def to_key(triple, context=None):
+        "Takes a triple of term ids and a context id; returns key"
+        if context is None:
+            return join((triple[first], triple[second], triple[third]))
+        return join((triple[first], triple[second], triple[third], context))
+
+    def prefix(triple):
+        parts = []
+        for position in order:
+            if triple[position] is None:
+                break
+            parts.append(triple[position])
+        return join(parts) if parts else b""
 
+    to_key.order = order
+    to_key.prefix = prefix
     return to_key
 
 
-def from_key_func(i):
+def graph_from_key_func(i, keys=DecimalKeys):
+    order = permutation(i)
+    # The key parts of the subject, predicate and object
+    s, p, o = (order.index(position) for position in range(3))
+    split = keys.split
+
     def from_key(key):
-        "Takes a key; returns string"
-        parts = key.split("^".encode("latin-1"))
-        return (
-            parts[0],
-            parts[(3 - i + 0) % 3 + 1],
-            parts[(3 - i + 1) % 3 + 1],
-            parts[(3 - i + 2) % 3 + 1],
-        )
+        "Takes a graph-last key; returns subject, predicate, object and context"
+        parts = split(key)
+        return (parts[s], parts[p], parts[o], parts[3])
 
     return from_key
 
 
-def results_from_key_func(i, from_string):
-    def from_key(key, subject, predicate, object, contexts_value):
-        "Takes a key and subject, predicate, object; returns tuple for yield"
-        parts = key.split("^".encode("latin-1"))
+def from_key_func(i, keys=DecimalKeys):
+    order = permutation(i)
+    # The key parts of the subject, predicate and object
+    s, p, o = (order.index(position) + 1 for position in range(3))
+    split = keys.split
+
+    def from_key(key):
+        "Takes a key; returns context, subject, predicate and object ids"
+        parts = split(key)
+        return (parts[0], parts[s], parts[p], parts[o])
+
+    return from_key
+
+
+def results_from_key_func(i, from_string, keys=DecimalKeys, contexts_of=None):
+    order = permutation(i)
+    # The key parts of the subject, predicate and object
+    si, pi, oi = (order.index(position) + 1 for position in range(3))
+    split = keys.split
+    split_contexts = keys.split_contexts
+    conjunctive = keys.conjunctive
+
+    def from_key(key, subject, predicate, object, contexts_value, decode=from_string):
+        """
+        Takes a key and subject, predicate, object; returns tuple for yield.
+        The terms of the triple are decoded by decode, the contexts are
+        left to from_string.
+        """
+        parts = split(key)
         if subject is None:
             # TODO: i & 1: # dis assemble and/or measure to see which is faster
             # subject is None or i & 1
-            s = from_string(parts[(3 - i + 0) % 3 + 1])
+            s = decode(parts[si])
         else:
             s = subject
         if predicate is None:  # i & 2:
-            p = from_string(parts[(3 - i + 1) % 3 + 1])
+            p = decode(parts[pi])
         else:
             p = predicate
         if object is None:  # i & 4:
-            o = from_string(parts[(3 - i + 2) % 3 + 1])
+            o = decode(parts[oi])
         else:
             o = object
+        if contexts_of is not None and parts[0] == conjunctive:
+            # The contexts are in a membership index, read if needed
+            contexts = contexts_of((parts[si], parts[pi], parts[oi]))
+        else:
+            contexts = split_contexts(contexts_value)
         return (
             (s, p, o),
-            (
-                from_string(c)
-                for c in contexts_value.split("^".encode("latin-1"))
-                if c
-            ),
+            (from_string(c) for c in contexts),
         )
 
     return from_key
@@ -89,6 +89,9 @@ setup(
         "rdf.plugins.store": [
             "LevelDB = rdflib_leveldb.leveldbstore:LevelDBStore",
         ],
+        "console_scripts": [
+            "rdflib-leveldb-load = rdflib_leveldb.bulkload:main",
+        ],
     },
     **kwargs,
 )
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+bob = URIRef("urn:bob")
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph(store=LevelDBStore(batch_size=3))
+    graph.open(path, create=True)
+    yield graph
+    graph.close()
+    graph.destroy(path)
+
+
+def test_addN(getgraph):
+    graph = getgraph
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    graph.addN(
+        [
+            (michel, likes, pizza, g1),
+            (tarek, likes, pizza, g1),
+            (bob, hates, pizza, g1),
+            (michel, likes, cheese, g1),
+            (michel, likes, pizza, g2),
+            (bob, likes, cheese, g2),
+            (bob, hates, michel, g2),
+        ]
+    )
+    assert len(g1) == 4
+    assert len(g2) == 3
+    assert len(graph) == 6
+    assert set(c.identifier for c in graph.contexts((michel, likes, pizza))) == {
+        graphuri,
+        othergraphuri,
+    }
+    assert set(graph.objects(michel, likes)) == {pizza, cheese}
+
+
+def test_addN_duplicates_within_batch(getgraph):
+    graph = getgraph
+    g1 = Graph(graph.store, graphuri)
+    graph.addN([(michel, likes, pizza, g1)] * 5 + [(bob, likes, pizza, g1)])
+    assert len(g1) == 2
+    assert len(graph) == 2
+    graph.addN([(michel, likes, pizza, g1)])
+    assert len(graph) == 2
+
+
+def test_addN_then_remove(getgraph):
+    graph = getgraph
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    graph.addN([(michel, likes, pizza, g1), (michel, likes, pizza, g2)])
+    g1.remove((michel, likes, pizza))
+    assert len(g1) == 0
+    assert list(graph.contexts((michel, likes, pizza))) == [g2]
+    assert len(graph) == 1
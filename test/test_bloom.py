@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import os
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import BloomFilter, LevelDBStore
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture
+def getpath():
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path
+    LevelDBStore().destroy(path)
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"key{n}".encode() for n in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other{n}".encode() in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_save_and_load(getpath):
+    os.mkdir(getpath)
+    bloom = BloomFilter(capacity=100)
+    bloom.add(b"a")
+    path = os.path.join(getpath, "bloom.filter")
+    bloom.save(path)
+    loaded = BloomFilter.load(path)
+    assert (loaded.bits, loaded.hashes) == (bloom.bits, bloom.hashes)
+    assert b"a" in loaded
+
+
+def populate(graph):
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    for n in range(20):
+        g1.add((michel, likes, URIRef(f"urn:{n}")))
+    g2.add((michel, likes, URIRef("urn:1")))
+    # Duplicates are still detected
+    g1.add((michel, likes, URIRef("urn:1")))
+    g2.add((michel, likes, URIRef("urn:1")))
+    return g1, g2
+
+
+def check(graph):
+    g1 = Graph(graph.store, graphuri)
+    assert len(g1) == 20
+    assert len(graph) == 20
+    assert set(
+        c.identifier for c in graph.contexts((michel, likes, URIRef("urn:1")))
+    ) == {
+        graphuri,
+        othergraphuri,
+    }
+
+
+def test_add_with_bloom_filter(getpath):
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True, bloom_capacity=100))
+    graph.open(getpath, create=True)
+    populate(graph)
+    check(graph)
+    graph.close()
+    filter_path = os.path.join(getpath, "bloom.filter")
+    assert os.path.exists(filter_path)
+
+    graph.open(getpath, create=False)
+    # Removed while the store is open
+    assert not os.path.exists(filter_path)
+    populate(graph)
+    check(graph)
+    graph.close()
+
+
+def test_bloom_filter_rebuilt_after_unfiltered_use(getpath):
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True))
+    graph.open(getpath, create=True)
+    graph.close()
+    # Modified without the filter, which must not be trusted afterwards
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(getpath, create=False)
+    populate(graph)
+    graph.close()
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True))
+    graph.open(getpath, create=False)
+    populate(graph)
+    check(graph)
+    graph.close()
+
+
+def test_rebuild_bloom_filter_in_transaction(getpath):
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True, transactional=True))
+    graph.open(getpath, create=True)
+    g1 = Graph(graph.store, graphuri)
+    g1.add((michel, likes, pizza))
+    with pytest.raises(AssertionError):
+        graph.store.rebuild_bloom_filter()
+    graph.commit()
+    graph.store.rebuild_bloom_filter()
+    g1.add((michel, likes, pizza))
+    assert len(graph) == 1
+    assert len(g1) == 1
+    graph.close()
+
+
+def test_rebuild_bloom_filter_with_write_behind(getpath):
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True, write_behind=True))
+    graph.open(getpath, create=True)
+    g1 = Graph(graph.store, graphuri)
+    g1.add((michel, likes, pizza))
+    graph.store.rebuild_bloom_filter()
+    g1.add((michel, likes, pizza))
+    assert len(graph) == 1
+    assert len(g1) == 1
+    graph.close()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib_leveldb.bulkload import bulk_load, external_sort, parallel_load
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+nquads = """\
+<urn:michel> <urn:likes> <urn:pizza> <urn:graph> .
+<urn:tarek> <urn:likes> <urn:pizza> <urn:graph> .
+# a comment
+<urn:michel> <urn:likes> <urn:pizza> <urn:othergraph> .
+<urn:michel> <urn:likes> <urn:pizza> <urn:graph> .
+<urn:bob> <urn:name> "Bob"@en <urn:othergraph> .
+<urn:bob> <urn:age> "42"^^<http://www.w3.org/2001/XMLSchema#integer> .
+_:b1 <urn:knows> _:b2 <urn:graph> .
+"""
+
+
+@pytest.fixture
+def getpath():
+    tmpdir = tempfile.mkdtemp(prefix="testleveldb")
+    source = os.path.join(tmpdir, "data.nq")
+    with open(source, "w") as f:
+        f.write(nquads)
+    path = os.path.join(tmpdir, "db")
+    yield path, source
+    import shutil
+
+    shutil.rmtree(tmpdir)
+
+
+def check(path):
+    graph = ConjunctiveGraph("LevelDB")
+    graph.open(path, create=False)
+    try:
+        g1 = Graph(graph.store, URIRef("urn:graph"))
+        g2 = Graph(graph.store, URIRef("urn:othergraph"))
+        default = Graph(graph.store, DATASET_DEFAULT_GRAPH_ID)
+        assert len(graph) == 5
+        assert len(g1) == 3
+        assert len(g2) == 2
+        assert len(default) == 1
+        triple = (URIRef("urn:michel"), URIRef("urn:likes"), URIRef("urn:pizza"))
+        assert set(c.identifier for c in graph.contexts(triple)) == {
+            URIRef("urn:graph"),
+            URIRef("urn:othergraph"),
+        }
+        assert list(g2.objects(URIRef("urn:bob"), URIRef("urn:name"))) == [
+            Literal("Bob", lang="en")
+        ]
+        assert default.value(URIRef("urn:bob"), URIRef("urn:age")) == Literal(42)
+        # Terms are shared with those added later
+        g1.add((URIRef("urn:bob"), URIRef("urn:likes"), URIRef("urn:pizza")))
+        assert set(g1.subjects(URIRef("urn:likes"), URIRef("urn:pizza"))) == {
+            URIRef("urn:michel"),
+            URIRef("urn:tarek"),
+            URIRef("urn:bob"),
+        }
+        assert len(graph.store) == 6
+    finally:
+        graph.close()
+
+
+def test_bulk_load(getpath):
+    path, source = getpath
+    assert bulk_load(path, source) == 7
+    check(path)
+
+
+def test_bulk_load_spilled_runs(getpath):
+    path, source = getpath
+    gzipped = source + ".gz"
+    with gzip.open(gzipped, "wt") as f:
+        f.write(nquads)
+    assert bulk_load(path, [gzipped], run_size=4, batch_size=3) == 7
+    check(path)
+
+
+def test_bulk_load_refuses_existing_store(getpath):
+    path, source = getpath
+    bulk_load(path, source)
+    with pytest.raises(Exception):
+        bulk_load(path, source)
+
+
+def test_parallel_load(getpath):
+    path, source = getpath
+    # Small chunks, so that each worker parses a few lines
+    assert parallel_load(path, source, processes=2, chunk_bytes=100) == 7
+    check(path)
+
+
+def test_parallel_load_blank_nodes_span_chunks(getpath):
+    path, source = getpath
+    with open(source, "w") as f:
+        f.write("_:a <urn:knows> _:b <urn:graph> .\n")
+        for n in range(50):
+            f.write(f"<urn:s{n}> <urn:p> <urn:o{n}> <urn:graph> .\n")
+        f.write("_:b <urn:knows> _:a <urn:graph> .\n")
+    assert parallel_load(path, [source], processes=2, chunk_bytes=200) == 52
+    graph = ConjunctiveGraph("LevelDB")
+    graph.open(path, create=False)
+    try:
+        knows = list(graph.triples((None, URIRef("urn:knows"), None)))
+        assert len(knows) == 2
+        (a, _, b), (c, _, d) = knows
+        assert (a, b) == (d, c)
+    finally:
+        graph.close()
+
+
+def test_external_sort():
+    entries = [(b"b", b"1"), (b"a", b"1"), (b"b", b"2"), (b"c", b"1"), (b"a", b"1")]
+
+    def merge(key, value, other):
+        return value + other
+
+    for run_size in (1, 2, 10):
+        assert list(external_sort(entries, merge, run_size)) == [
+            (b"a", b"11"),
+            (b"b", b"12"),
+            (b"c", b"1"),
+        ]
+
+
+def test_bulk_load_with_bloom_filter(getpath):
+    path, source = getpath
+    assert bulk_load(path, source, bloom_filter=True) == 7
+    graph = ConjunctiveGraph(LevelDBStore(bloom_filter=True))
+    graph.open(path, create=False)
+    try:
+        # Already loaded, the saved filter must know the triple
+        triple = (URIRef("urn:michel"), URIRef("urn:likes"), URIRef("urn:pizza"))
+        Graph(graph.store, URIRef("urn:graph")).add(triple)
+        Graph(graph.store, URIRef("urn:thirdgraph")).add(triple)
+        assert len(graph) == 5
+        assert len(Graph(graph.store, URIRef("urn:graph"))) == 3
+        assert set(c.identifier for c in graph.contexts(triple)) == {
+            URIRef("urn:graph"),
+            URIRef("urn:othergraph"),
+            URIRef("urn:thirdgraph"),
+        }
+    finally:
+        graph.close()
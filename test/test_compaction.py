@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+import time
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture
+def getpath():
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path
+    LevelDBStore().destroy(path)
+
+
+def open_graph(path, **kwargs):
+    store = LevelDBStore(**kwargs)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    compactions = []
+    compact = store._LevelDBStore__compact
+
+    def counted_compact(c):
+        compactions.append(c)
+        compact(c)
+
+    store._LevelDBStore__compact = counted_compact
+    g1 = Graph(store, graphuri)
+    g2 = Graph(store, othergraphuri)
+    graph.addN((URIRef(f"urn:person{n}"), likes, pizza, g1) for n in range(20))
+    graph.addN((URIRef(f"urn:person{n}"), likes, pizza, g2) for n in range(5))
+    return graph, g1, g2, compactions
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_compact(getpath):
+    graph, g1, g2, compactions = open_graph(getpath)
+    graph.store.remove_graph(g1)
+    graph.store.compact(g1)
+    graph.store.compact()
+    assert len(compactions) == 2
+    assert compactions[1] is None
+    assert len(g1) == 0
+    assert len(g2) == 5
+    assert len(graph) == 5
+    graph.close()
+
+
+def test_compaction_after_large_removes(getpath):
+    graph, g1, g2, compactions = open_graph(
+        getpath, compaction_threshold=10, compaction_interval=60.0
+    )
+    store = graph.store
+    g2.remove((None, likes, None))
+    # Too few removes to schedule a compaction
+    assert store._LevelDBStore__compaction_timer is None
+    g1.remove((None, likes, None))
+    assert wait_for(lambda: len(compactions) == 1)
+    assert compactions[0] is not None
+    # Rate limited: the next one waits for the interval after the first,
+    # whether or not the first is still running
+    graph.addN((URIRef(f"urn:person{n}"), likes, pizza, g1) for n in range(20))
+    graph.remove((None, likes, None))
+    assert wait_for(
+        lambda: store._LevelDBStore__compaction_timer is not None
+        and store._LevelDBStore__compaction_timer.interval > 30.0
+    )
+    assert len(compactions) == 1
+    # Closing cancels it
+    graph.close()
+    assert len(compactions) == 1
+
+
+def test_compaction_waits_for_commit(getpath):
+    graph, g1, g2, compactions = open_graph(
+        getpath, transactional=True, compaction_threshold=10
+    )
+    store = graph.store
+    graph.commit()
+    g1.remove((None, likes, None))
+    graph.rollback()
+    assert store._LevelDBStore__compaction_timer is None
+    g1.remove((None, likes, None))
+    # Scheduled by the commit
+    assert store._LevelDBStore__compaction_timer is None
+    graph.commit()
+    assert wait_for(lambda: len(compactions) == 1)
+    assert len(g1) == 0
+    graph.close()
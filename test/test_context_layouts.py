@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.bulkload import bulk_load
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuris = [URIRef(f"urn:graph{n}") for n in range(5)]
+
+
+@pytest.fixture(params=["decimal", "binary", "varint"])
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(key_format=request.param, context_layout="index")
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def test_unknown_context_layout():
+    with pytest.raises(ValueError):
+        LevelDBStore(context_layout="scattered")
+
+
+def test_membership_index(getgraph):
+    graph, path = getgraph
+    graphs = [Graph(graph.store, uri) for uri in graphuris]
+    for g in graphs:
+        g.add((michel, likes, pizza))
+    graphs[0].add((tarek, likes, cheese))
+    assert len(graph) == 2
+    assert set(c.identifier for c in graph.contexts((michel, likes, pizza))) == set(
+        graphuris
+    )
+    ((triple, contexts),) = graph.store.triples((michel, None, None))
+    assert triple == (michel, likes, pizza)
+    assert set(c.identifier for c in contexts) == set(graphuris)
+    # The conjunctive index values stay empty
+    index = graph.store._LevelDBStore__indices[0]
+    assert set(index.iterator(include_key=False)) == {b""}
+
+    for g in graphs[1:]:
+        g.remove((michel, likes, pizza))
+    assert list(graph.contexts((michel, likes, pizza))) == [graphs[0]]
+    assert (michel, likes, pizza) in graph
+    graphs[0].remove((michel, likes, pizza))
+    assert (michel, likes, pizza) not in graph
+    assert len(graph) == 1
+
+
+def test_remove_everywhere(getgraph):
+    graph, path = getgraph
+    for uri in graphuris:
+        Graph(graph.store, uri).add((michel, likes, pizza))
+    graph.remove((michel, None, None))
+    assert len(graph) == 0
+    assert list(graph.contexts((michel, likes, pizza))) == []
+    membership = graph.store._LevelDBStore__membership
+    assert list(membership.iterator()) == []
+
+
+def test_layout_is_recorded(getgraph):
+    graph, path = getgraph
+    Graph(graph.store, graphuris[0]).add((michel, likes, pizza))
+    graph.close()
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.context_layout == "index"
+    assert list(graph.contexts((michel, likes, pizza))) == [
+        Graph(graph.store, graphuris[0])
+    ]
+    graph.close()
+
+
+def test_bulk_load(tmp_path):
+    source = tmp_path / "data.nq"
+    source.write_text(
+        "".join(
+            f"<urn:michel> <urn:likes> <urn:pizza> <{uri}> .\n" for uri in graphuris
+        )
+    )
+    path = str(tmp_path / "db")
+    assert bulk_load(path, [str(source)], context_layout="index") == 5
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.context_layout == "index"
+    assert len(graph) == 1
+    assert set(c.identifier for c in graph.contexts((michel, likes, pizza))) == set(
+        graphuris
+    )
+    graph.close()
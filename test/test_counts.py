@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+bob = URIRef("urn:bob")
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture(params=["list", "index"])
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph(
+        LevelDBStore(context_layout=request.param, transactional=True)
+    )
+    graph.open(path, create=True)
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def lengths(graph):
+    return [len(graph)] + [
+        len(Graph(graph.store, g)) for g in (graphuri, othergraphuri)
+    ]
+
+
+def scanned_lengths(graph):
+    # Without the counts, the keys are counted
+    counted = graph.store._LevelDBStore__counted
+    graph.store._LevelDBStore__counted = False
+    try:
+        return lengths(graph)
+    finally:
+        graph.store._LevelDBStore__counted = counted
+
+
+def test_counts(getgraph):
+    graph, path = getgraph
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    g1.add((michel, likes, pizza))
+    g1.add((michel, likes, pizza))
+    g1.add((tarek, likes, pizza))
+    graph.addN([(michel, likes, pizza, g2), (bob, hates, cheese, g2)])
+    assert lengths(graph) == scanned_lengths(graph) == [3, 2, 2]
+    g1.remove((michel, likes, pizza))
+    assert lengths(graph) == scanned_lengths(graph) == [3, 1, 2]
+    graph.remove((None, likes, None))
+    assert lengths(graph) == scanned_lengths(graph) == [1, 0, 1]
+    g2.remove((bob, hates, cheese))
+    g2.remove((bob, hates, cheese))
+    assert lengths(graph) == [0, 0, 0]
+    assert list(graph.store._LevelDBStore__counts.iterator()) == []
+
+
+def test_counts_in_transactions(getgraph):
+    graph, path = getgraph
+    g1 = Graph(graph.store, graphuri)
+    g1.add((michel, likes, pizza))
+    graph.commit()
+    g1.add((tarek, likes, pizza))
+    assert lengths(graph) == [2, 2, 0]
+    graph.rollback()
+    assert lengths(graph) == [1, 1, 0]
+
+
+def test_quoted_triples_are_not_conjunctive(getgraph):
+    graph, path = getgraph
+    quoted = Graph(graph.store, URIRef("urn:formula"))
+    graph.store.add((michel, likes, cheese), quoted, quoted=True)
+    assert len(graph) == 0
+    assert len(quoted) == 1
+    quoted.remove((None, None, None))
+    assert len(graph) == 0
+    assert len(quoted) == 0
+
+
+def test_recount(getgraph):
+    graph, path = getgraph
+    g1 = Graph(graph.store, graphuri)
+    g1.add((michel, likes, pizza))
+    g1.add((tarek, likes, pizza))
+    graph.commit()
+    # As written before the counts were kept
+    graph.store.db.delete(b"metacounted")
+    for key in graph.store.db.iterator(prefix=b"counts", include_value=False):
+        graph.store.db.delete(key)
+    graph.close()
+
+    graph.open(path, create=False)
+    assert lengths(graph) == [2, 2, 0]
+    g1.add((bob, likes, pizza))
+    graph.commit()
+    assert lengths(graph) == [3, 3, 0]
+    assert list(graph.store.db.iterator(prefix=b"counts")) == []
+    graph.store.recount()
+    assert lengths(graph) == [3, 3, 0]
+    g1.remove((bob, likes, pizza))
+    assert lengths(graph) == scanned_lengths(graph) == [2, 2, 0]
+    graph.commit()
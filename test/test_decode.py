@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(decode_batch_size=3)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    batches = []
+    decode = store._LevelDBStore__decode
+
+    def counted_decode(batch, from_key, spo):
+        terms = decode(batch, from_key, spo)
+        batches.append((len(batch), len(terms)))
+        return terms
+
+    store._LevelDBStore__decode = counted_decode
+    g = Graph(store, graphuri)
+    graph.addN((michel, likes, Literal(n), g) for n in range(10))
+    yield graph, batches
+    graph.close()
+    graph.destroy(path)
+
+
+def test_batched_decoding(getgraph):
+    graph, batches = getgraph
+    assert set(graph.objects(michel, likes)) == {Literal(n) for n in range(10)}
+    # Growing to decode_batch_size, only the objects are decoded
+    assert batches == [(1, 1), (2, 2), (3, 3), (3, 3), (1, 1)]
+    del batches[:]
+    triples = list(graph.triples((None, None, None)))
+    assert len(triples) == 10
+    # The subject and predicate are decoded once per batch
+    assert batches == [(1, 3), (2, 4), (3, 5), (3, 5), (1, 3)]
+
+
+def test_first_result_decodes_one(getgraph):
+    graph, batches = getgraph
+    assert graph.value(michel, likes) is not None
+    assert batches == [(1, 1)]
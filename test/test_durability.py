@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+import time
+from rdflib import Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+
+
+@pytest.fixture
+def getpath():
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path
+    LevelDBStore().destroy(path)
+
+
+def open_graph(path, **kwargs):
+    store = LevelDBStore(**kwargs)
+    graph = Graph(store, URIRef("urn:graph"))
+    graph.open(path, create=True)
+    syncs = []
+    sync = store.sync
+
+    def counted_sync():
+        syncs.append(time.time())
+        sync()
+
+    store.sync = counted_sync
+    return graph, syncs
+
+
+def test_unknown_durability():
+    with pytest.raises(ValueError):
+        LevelDBStore(durability="sometimes")
+
+
+class RecordingDB(object):
+    "Records the sync argument of each write batch of db"
+
+    def __init__(self, db):
+        self.db = db
+        self.syncs = []
+
+    def write_batch(self, sync=False, **kwargs):
+        self.syncs.append(sync)
+        return self.db.write_batch(sync=sync, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+@pytest.mark.parametrize("durability", ["none", "sync"])
+def test_durability(getpath, durability):
+    graph, syncs = open_graph(getpath, durability=durability)
+    db = graph.store.db = RecordingDB(graph.store.db)
+    for n in range(5):
+        graph.add((URIRef("urn:a"), likes, URIRef(f"urn:{n}")))
+    assert db.syncs == [durability == "sync"] * 5
+    graph.close()
+    assert syncs == []
+    graph.open(getpath, create=False)
+    assert len(graph) == 5
+    graph.close()
+
+
+def test_group_commit_size(getpath):
+    graph, syncs = open_graph(
+        getpath, durability="group", group_commit_size=3, group_commit_interval=60
+    )
+    for n in range(7):
+        graph.add((URIRef("urn:a"), likes, URIRef(f"urn:{n}")))
+    assert len(syncs) == 2
+    # The last write is synced on close
+    graph.close()
+    assert len(syncs) == 3
+    graph.open(getpath, create=False)
+    assert len(graph) == 7
+    graph.close()
+
+
+def test_group_commit_interval(getpath):
+    graph, syncs = open_graph(
+        getpath, durability="group", group_commit_size=1000, group_commit_interval=0.05
+    )
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:b")))
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:c")))
+    assert syncs == []
+    time.sleep(0.5)
+    assert len(syncs) == 1
+    graph.close()
+    assert len(syncs) == 1
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib.store import Store, TripleAddedEvent, TripleRemovedEvent
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph("LevelDB")
+    graph.open(path, create=True)
+    yield graph
+    graph.close()
+    graph.destroy(path)
+
+
+def test_events_dispatched_to_subscribers(getgraph):
+    graph = getgraph
+    events = []
+    graph.store.dispatcher.subscribe(TripleAddedEvent, events.append)
+    graph.store.dispatcher.subscribe(TripleRemovedEvent, events.append)
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.addN([(michel, likes, cheese, g)])
+    g.remove((michel, likes, None))
+    assert [type(e) for e in events] == [
+        TripleAddedEvent,
+        TripleAddedEvent,
+        TripleRemovedEvent,
+    ]
+    assert events[1].triple == (michel, likes, cheese)
+
+
+def test_no_events_built_without_subscribers(getgraph, monkeypatch):
+    graph = getgraph
+    calls = []
+    monkeypatch.setattr(Store, "add", lambda *args: calls.append(args))
+    monkeypatch.setattr(Store, "remove", lambda *args: calls.append(args))
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.addN([(michel, likes, cheese, g)])
+    g.remove((michel, likes, None))
+    assert calls == []
+    assert len(g) == 0
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.bulkload import bulk_load
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuris = [URIRef(f"urn:graph{n}") for n in range(3)]
+
+
+@pytest.fixture(params=["list", "index"])
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(
+        context_layout=request.param, graph_permutations=("spo", "pos")
+    )
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    for n, uri in enumerate(graphuris):
+        g = Graph(store, uri)
+        g.add((michel, likes, pizza))
+        if n:
+            g.add((tarek, hates, cheese))
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def contexts(graph, triple):
+    return set(c.identifier for c in graph.contexts(triple))
+
+
+def test_invalid_graph_permutations():
+    with pytest.raises(ValueError):
+        LevelDBStore(graph_permutations=("spo", "spo"))
+    with pytest.raises(ValueError):
+        LevelDBStore(graph_permutations=("cspo",))
+
+
+def test_contexts(getgraph):
+    graph, path = getgraph
+    assert contexts(graph, (michel, likes, pizza)) == set(graphuris)
+    assert contexts(graph, (tarek, hates, cheese)) == set(graphuris[1:])
+    assert contexts(graph, (tarek, likes, cheese)) == set()
+
+
+def test_quads(getgraph):
+    graph, path = getgraph
+    quads = set(
+        (s, p, o, c.identifier) for s, p, o, c in graph.quads((None, hates, None))
+    )
+    assert quads == {(tarek, hates, cheese, uri) for uri in graphuris[1:]}
+    quads = set(
+        (s, p, o, c.identifier) for s, p, o, c in graph.quads((michel, None, None))
+    )
+    assert quads == {(michel, likes, pizza, uri) for uri in graphuris}
+    # Patterns no graph-last index serves still find their contexts
+    quads = set(graph.quads((None, None, cheese)))
+    assert len(quads) == 2
+    assert len(list(graph.quads((None, None, None)))) == 5
+    assert len(list(graph.triples((None, None, None)))) == 2
+
+
+def test_remove(getgraph):
+    graph, path = getgraph
+    Graph(graph.store, graphuris[0]).remove((michel, likes, pizza))
+    assert contexts(graph, (michel, likes, pizza)) == set(graphuris[1:])
+    graph.remove((None, hates, None))
+    assert contexts(graph, (tarek, hates, cheese)) == set()
+    assert list(graph.quads((tarek, None, None))) == []
+    graph.store.remove_graph(Graph(graph.store, graphuris[1]))
+    assert set(c.identifier for s, p, o, c in graph.quads((None, likes, None))) == {
+        graphuris[2]
+    }
+
+
+def test_graph_permutations_are_recorded(getgraph):
+    graph, path = getgraph
+    graph.close()
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.graph_permutations == ("spo", "pos")
+    assert contexts(graph, (tarek, hates, cheese)) == set(graphuris[1:])
+    graph.close()
+
+
+def test_bulk_load(tmp_path):
+    source = tmp_path / "data.nq"
+    source.write_text(
+        "".join(
+            f"<urn:michel> <urn:likes> <urn:pizza> <{uri}> .\n" for uri in graphuris
+        )
+    )
+    path = str(tmp_path / "db")
+    bulk_load(path, [str(source)], graph_permutations=("pos",))
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert contexts(graph, (michel, likes, pizza)) == set(graphuris)
+    assert len(list(graph.quads((None, likes, None)))) == 3
+    graph.close()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import os
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib_leveldb import leveldbstore
+from rdflib_leveldb.bulkload import bulk_load
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+bob = URIRef("urn:bob")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture
+def getpaths():
+    tmpdir = tempfile.mkdtemp(prefix="testleveldb")
+    yield os.path.join(tmpdir, "a"), os.path.join(tmpdir, "b")
+    import shutil
+
+    shutil.rmtree(tmpdir)
+
+
+def create(path, **options):
+    graph = ConjunctiveGraph(LevelDBStore(term_ids="hash", **options))
+    graph.open(path, create=True)
+    return graph
+
+
+def test_unknown_term_ids():
+    with pytest.raises(ValueError):
+        LevelDBStore(term_ids="uuid")
+
+
+def test_same_ids_across_stores(getpaths):
+    a, b = getpaths
+    graph = create(a)
+    Graph(graph.store, graphuri).add((michel, likes, pizza))
+    ids = [graph.store._to_string(term) for term in (michel, likes, pizza)]
+    graph.close()
+
+    source = a + ".nt"
+    with open(source, "w") as f:
+        f.write("<urn:pizza> <urn:likes> <urn:michel> .\n")
+    bulk_load(b, source, term_ids="hash")
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(b, create=False)
+    assert graph.store.term_ids == "hash"
+    assert [graph.store._to_string(term) for term in (michel, likes, pizza)] == ids
+    graph.close()
+
+
+@pytest.mark.parametrize("context_layout", ["list", "index"])
+def test_merge(getpaths, context_layout):
+    a, b = getpaths
+    graph = create(b, context_layout=context_layout)
+    graph.bind("ex", "urn:ex#")
+    Graph(graph.store, graphuri).add((michel, likes, pizza))
+    Graph(graph.store, othergraphuri).add((michel, likes, pizza))
+    Graph(graph.store, othergraphuri).add((bob, likes, Literal("cheddar cheese")))
+    graph.close()
+
+    graph = create(a, context_layout=context_layout)
+    g1 = Graph(graph.store, graphuri)
+    g1.add((michel, likes, pizza))
+    g1.add((tarek, likes, cheese))
+    graph.store.merge(b)
+    g2 = Graph(graph.store, othergraphuri)
+    assert len(graph) == 3
+    assert len(g1) == 2
+    assert len(g2) == 2
+    assert set(c.identifier for c in graph.contexts((michel, likes, pizza))) == {
+        graphuri,
+        othergraphuri,
+    }
+    assert list(graph.subjects(likes, Literal("cheddar cheese"))) == [bob]
+    assert graph.store.namespace("ex") == URIRef("urn:ex#")
+    graph.remove((michel, None, None))
+    assert len(graph) == 2
+    graph.close()
+
+
+def test_merge_checks(getpaths):
+    a, b = getpaths
+    graph = create(b, key_format="decimal")
+    graph.close()
+    graph = create(a)
+    with pytest.raises(ValueError):
+        graph.store.merge(b)
+    graph.close()
+
+
+def test_collisions(getpaths, monkeypatch):
+    a, b = getpaths
+    # Every term hashes to 1 first, then to 1 + attempt
+    monkeypatch.setattr(leveldbstore, "term_hash", lambda k, attempt=0: 1 + attempt)
+    graph = create(a)
+    Graph(graph.store, graphuri).add((michel, likes, pizza))
+    ids = {graph.store._to_string(term) for term in (michel, likes, pizza)}
+    assert len(ids) == 3
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+    graph.close()
+
+    graph = create(b)
+    Graph(graph.store, graphuri).add((tarek, likes, pizza))
+    graph.close()
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(a, create=False)
+    # The same ids are different terms in the two stores
+    with pytest.raises(ValueError):
+        graph.store.merge(b)
+    assert len(graph) == 1
+    graph.close()
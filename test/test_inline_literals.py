@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from datetime import date
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib.namespace import XSD
+from rdflib_leveldb.leveldbstore import LevelDBStore, inline_id, inline_term
+
+sensor = URIRef("urn:sensor")
+reading = URIRef("urn:reading")
+graphuri = URIRef("urn:graph")
+
+inlined = [
+    Literal(0),
+    Literal(-42),
+    Literal(2**55 - 1),
+    Literal(-(2**55)),
+    Literal("7", datatype=XSD.int),
+    Literal("7", datatype=XSD.long),
+    Literal(True),
+    Literal(False),
+    Literal(date(2021, 11, 16)),
+    Literal(date(1, 1, 1)),
+    Literal(""),
+    Literal("pizza"),
+    Literal("caffè"),
+]
+
+not_inlined = [
+    Literal(2**55),
+    Literal("pizzaiolo"),
+    Literal("pizza", lang="it"),
+    Literal("pizza", datatype=XSD.string),
+    Literal("01", datatype=XSD.integer, normalize=False),
+    Literal("1", datatype=XSD.boolean, normalize=False),
+    Literal("not a number", datatype=XSD.integer),
+    Literal(1.5),
+    URIRef("urn:x"),
+]
+
+
+@pytest.fixture
+def getpath():
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path
+    LevelDBStore().destroy(path)
+
+
+def test_inline_ids():
+    for term in inlined:
+        i = inline_id(term)
+        assert len(i) == 8
+        loaded = inline_term(i)
+        assert loaded == term
+        assert loaded.datatype == term.datatype
+    for term in not_inlined:
+        assert inline_id(term) is None
+    ids = [inline_id(Literal(n)) for n in (-(2**40), -1, 0, 1, 255, 256, 2**40)]
+    assert sorted(ids) == ids
+
+
+def test_inline_literals_skip_the_dictionary(getpath):
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(getpath, create=True)
+    g = Graph(graph.store, graphuri)
+    g.add((sensor, reading, Literal("pizzaiolo")))
+    terms = graph.store._terms
+    for term in inlined:
+        g.add((sensor, reading, term))
+    assert graph.store._terms == terms
+    graph.close()
+
+    graph = ConjunctiveGraph(LevelDBStore(inline_literals=False))
+    graph.open(getpath, create=False)
+    assert graph.store.inline_literals is True
+    assert set(graph.objects(sensor, reading)) == set(inlined) | {Literal("pizzaiolo")}
+    assert list(graph.subjects(reading, Literal(-42))) == [sensor]
+    graph.remove((None, reading, Literal(True)))
+    assert len(graph) == len(inlined)
+    graph.close()
+
+
+@pytest.mark.parametrize(
+    "options", [dict(inline_literals=False), dict(key_format="decimal")]
+)
+def test_not_inlined(getpath, options):
+    graph = ConjunctiveGraph(LevelDBStore(**options))
+    graph.open(getpath, create=True)
+    assert graph.store.inline_literals is False
+    g = Graph(graph.store, graphuri)
+    terms = graph.store._terms
+    g.add((sensor, reading, Literal(42)))
+    assert graph.store._terms == terms + 4
+    graph.close()
+
+    # Whether a store inlines is read back from it
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(getpath, create=False)
+    assert graph.store.inline_literals is False
+    assert list(graph.objects(sensor, reading)) == [Literal(42)]
+    graph.close()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib_leveldb.leveldbstore import (
+    BinaryKeys,
+    DecimalKeys,
+    LevelDBStore,
+    VarintKeys,
+    inline_id,
+)
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture(params=["decimal", "binary", "varint"])
+def getpath(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path, request.param
+    LevelDBStore().destroy(path)
+
+
+def populate(graph):
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    g1.add((michel, likes, pizza))
+    g1.add((tarek, likes, cheese))
+    g2.add((michel, likes, pizza))
+    g2.add((michel, likes, Literal(10)))
+    return g1, g2
+
+
+def test_key_formats(getpath):
+    path, key_format = getpath
+    graph = ConjunctiveGraph(LevelDBStore(key_format=key_format))
+    graph.open(path, create=True)
+    g1, g2 = populate(graph)
+    graph.close()
+
+    # The format is read back from the store, whatever is asked for
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.key_format == key_format
+    g1 = Graph(graph.store, graphuri)
+    g2 = Graph(graph.store, othergraphuri)
+    assert len(graph) == 3
+    assert len(g1) == 2
+    assert set(graph.objects(michel, likes)) == {pizza, Literal(10)}
+    assert set(c.identifier for c in graph.contexts((michel, likes, pizza))) == {
+        graphuri,
+        othergraphuri,
+    }
+    g1.remove((michel, likes, pizza))
+    assert list(graph.contexts((michel, likes, pizza))) == [g2]
+    graph.remove((michel, None, None))
+    assert list(graph.triples((None, None, None))) == [(tarek, likes, cheese)]
+    graph.close()
+
+
+def test_store_without_format_header_is_decimal(getpath):
+    path, key_format = getpath
+    graph = ConjunctiveGraph(LevelDBStore(key_format="decimal"))
+    graph.open(path, create=True)
+    populate(graph)
+    # As written before the format header existed
+    graph.store.db.delete(b"metakey_format")
+    graph.close()
+
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.key_format == "decimal"
+    assert len(graph) == 3
+    graph.close()
+
+
+def test_binary_ids_sort_numerically():
+    ids = [BinaryKeys.id(n) for n in (1, 2, 10, 255, 256, 70000)]
+    assert sorted(ids) == ids
+    assert sorted(DecimalKeys.id(n) for n in (2, 10)) != [b"2", b"10"]
+    key = BinaryKeys.join((BinaryKeys.conjunctive,) + tuple(ids[:3]))
+    assert len(key) == 32
+    assert BinaryKeys.split(key) == (BinaryKeys.conjunctive,) + tuple(ids[:3])
+    value = BinaryKeys.join_contexts(ids[3:])
+    assert BinaryKeys.split_contexts(value) == ids[3:]
+
+
+def test_varint_ids_sort_numerically():
+    numbers = (1, 2, 10, 255, 256, 70000, 1 << 40, (1 << 63) - 1)
+    ids = [VarintKeys.id(n) for n in numbers]
+    assert sorted(ids) == ids
+    assert [VarintKeys.number(i) for i in ids] == list(numbers)
+    assert [len(i) for i in ids[:6]] == [2, 2, 2, 2, 3, 4]
+    assert VarintKeys.id(0) == VarintKeys.conjunctive
+    parts = (VarintKeys.conjunctive, ids[5], inline_id(Literal(10)), ids[0])
+    key = VarintKeys.join(parts)
+    assert VarintKeys.split(key) == list(parts)
+    value = VarintKeys.join_contexts(ids[3:])
+    assert VarintKeys.split_contexts(value) == ids[3:]
+
+
+def test_unknown_key_format():
+    with pytest.raises(ValueError):
+        LevelDBStore(key_format="hex")
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore, permutation
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture
+def getpath():
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path
+    LevelDBStore().destroy(path)
+
+
+def populate(graph):
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.add((michel, hates, cheese))
+    g.add((tarek, likes, cheese))
+    g.add((tarek, hates, pizza))
+    return g
+
+
+@pytest.mark.parametrize(
+    "permutations", [(), ("spo", "spo"), ("spo", "sp"), ("spo", "spx")]
+)
+def test_invalid_permutations(permutations):
+    with pytest.raises(ValueError):
+        LevelDBStore(permutations=permutations)
+
+
+def test_permutation():
+    assert permutation(0) == permutation("spo") == (0, 1, 2)
+    assert permutation(1) == permutation("pos") == (1, 2, 0)
+    assert permutation(2) == permutation("osp") == (2, 0, 1)
+    assert permutation("pso") == (1, 0, 2)
+
+
+@pytest.mark.parametrize("permutations", [("spo",), ("ops", "pso"), ("sop", "pos")])
+def test_queries(getpath, permutations):
+    graph = ConjunctiveGraph(LevelDBStore(permutations=permutations))
+    graph.open(getpath, create=True)
+    g = populate(graph)
+    assert set(g.subjects(likes, None)) == {michel, tarek}
+    assert set(g.objects(michel, None)) == {pizza, cheese}
+    assert set(g.subjects(None, pizza)) == {michel, tarek}
+    assert set(graph.predicates(tarek, cheese)) == {likes}
+    assert set(graph.subjects(hates, cheese)) == {michel}
+    assert (tarek, hates, pizza) in graph
+    assert len(list(graph.triples((None, None, None)))) == 4
+    g.remove((None, likes, None))
+    assert set(g) == {(michel, hates, cheese), (tarek, hates, pizza)}
+    graph.close()
+
+
+def test_indices_written(getpath):
+    graph = ConjunctiveGraph(LevelDBStore(permutations=("pso",)))
+    graph.open(getpath, create=True)
+    populate(graph)
+    db = graph.store.db
+    # Only the pso index is written, for the context and conjunctively
+    assert len(list(db.iterator(prefix=b"c^p^s^o^"))) == 8
+    for name in (b"c^s^p^o^", b"c^p^o^s^", b"c^o^s^p^"):
+        assert list(db.iterator(prefix=name)) == []
+    graph.close()
+
+    # The permutations are read back from the store
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(getpath, create=False)
+    assert graph.store.permutations == ("pso",)
+    assert set(graph.objects(tarek, None)) == {pizza, cheese}
+    graph.close()
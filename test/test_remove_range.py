@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+othergraphuri = URIRef("urn:othergraph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(batch_size=3)
+    graph = ConjunctiveGraph(store=store)
+    graph.open(path, create=True)
+    batches = []
+    write = store._LevelDBStore__write
+
+    def counted_write(pending):
+        batches.append(len(pending))
+        write(pending)
+
+    g1 = Graph(store, graphuri)
+    g2 = Graph(store, othergraphuri)
+    people = [URIRef(f"urn:person{n}") for n in range(10)]
+    graph.addN((person, likes, pizza, g1) for person in people)
+    graph.addN((person, hates, pizza, g2) for person in people[:4])
+    graph.addN((person, likes, pizza, g2) for person in people[:2])
+    store._LevelDBStore__write = counted_write
+    yield graph, g1, g2, batches
+    graph.close()
+    graph.destroy(path)
+
+
+def test_remove_graph(getgraph):
+    graph, g1, g2, batches = getgraph
+    graph.store.remove_graph(g1)
+    assert len(g1) == 0
+    assert len(g2) == 6
+    assert len(graph) == 6
+    assert set(graph.contexts()) == {g2}
+    for person in g2.subjects(likes, pizza):
+        assert list(graph.contexts((person, likes, pizza))) == [g2]
+    # 10 triples in chunks of 3, and the deletion of the context
+    assert len(batches) == 5
+
+
+def test_remove_pattern_everywhere(getgraph):
+    graph, g1, g2, batches = getgraph
+    graph.remove((None, likes, None))
+    assert len(g1) == 0
+    assert len(g2) == 4
+    assert set(graph.predicates()) == {hates}
+    # 10 triples in chunks of 3
+    assert len(batches) == 4
+
+
+def test_remove_pattern_in_context(getgraph):
+    graph, g1, g2, batches = getgraph
+    g2.remove((None, likes, None))
+    assert len(g2) == 4
+    assert len(g1) == 10
+    assert len(graph) == 14
+    assert len(batches) == 1
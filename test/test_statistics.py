@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+knows = URIRef("urn:knows")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+people = [URIRef(f"urn:person{n}") for n in range(20)]
+
+
+@pytest.fixture(params=[("spo", "pos", "osp"), ("osp",)])
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph(LevelDBStore(permutations=request.param))
+    graph.open(path, create=True)
+    g = Graph(graph.store, graphuri)
+    # 20 people like pizza and 10 of them cheese too, 4 hate cheese
+    graph.addN((person, likes, pizza, g) for person in people)
+    graph.addN((person, likes, cheese, g) for person in people[:10])
+    graph.addN((person, hates, cheese, g) for person in people[:4])
+    yield graph, g
+    graph.close()
+    graph.destroy(path)
+
+
+def test_estimate_without_statistics(getgraph):
+    graph, g = getgraph
+    store = graph.store
+    assert store.estimate((None, None, None)) == 34
+    assert store.estimate((None, likes, None)) == 30
+    assert store.estimate((None, likes, None), g) == 30
+    assert store.estimate((people[0], None, None)) == 3
+    assert store.estimate((None, None, cheese)) == 14
+    assert store.estimate((None, knows, None)) == 0
+    # Counted up to the limit
+    assert store.estimate((None, likes, None), limit=5) >= 5
+
+
+def test_statistics(getgraph):
+    graph, g = getgraph
+    store = graph.store
+    store.rebuild_statistics()
+    statistics = dict(store._LevelDBStore__statistics.iterator())
+    likes_id = store._to_string(likes)
+    hates_id = store._to_string(hates)
+    # triples, distinct subjects and distinct objects
+    assert statistics == {likes_id: b"30 20 2", hates_id: b"4 4 1"}
+    assert store.estimate((None, likes, None)) == 30
+    assert store.estimate((people[0], likes, None)) == 2
+    assert store.estimate((None, likes, pizza)) == 15
+    assert store.estimate((None, hates, cheese)) == 4
+    assert store.estimate((people[0], likes, pizza)) == 1
+    # Rebuilding replaces them
+    g.remove((None, hates, None))
+    store.rebuild_statistics()
+    assert store.estimate((None, hates, None)) == 0
+    assert hates_id not in dict(store._LevelDBStore__statistics.iterator())
+
+
+def test_statistics_follow_writes(getgraph):
+    graph, g = getgraph
+    store = graph.store
+    store.rebuild_statistics()
+    g.remove((None, hates, None))
+    assert store.estimate((None, hates, None)) == 0
+    assert store.estimate((people[0], hates, None)) == 0
+    # Half the likes, half the pizza likers are left
+    g.remove((None, likes, cheese))
+    graph.remove((people[10], likes, None))
+    for person in people[11:]:
+        g.remove((person, likes, pizza))
+    assert store.estimate((None, likes, None)) == 10
+    assert store.estimate((people[0], likes, None)) == 2
+    assert store.estimate((None, likes, pizza)) == 10
+    g.add((people[0], hates, cheese))
+    assert store.estimate((None, hates, None)) == 1
+    assert store.estimate((None, hates, cheese)) == 1
+    # The same counts as counting them again
+    counts = dict(store._LevelDBStore__predicates.iterator())
+    store.recount()
+    assert dict(store._LevelDBStore__predicates.iterator()) == counts
+    assert counts == {
+        store._to_string(likes): b"10",
+        store._to_string(hates): b"1",
+    }
+
+
+def test_estimate_from_approximate_size(getgraph):
+    graph, g = getgraph
+    store = graph.store
+    graph.addN((person, knows, other, g) for person in people for other in people)
+    # Written to disk, for LevelDB to size the ranges
+    store.compact()
+    estimate = store.estimate((None, knows, None), limit=10)
+    assert 10 <= estimate <= 1000
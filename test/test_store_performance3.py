@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import unittest
+import gc
+import logging
+from time import time
+import tempfile
+from itertools import takewhile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+logging.basicConfig(level=logging.ERROR, format="%(message)s")
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+likes = URIRef("urn:likes")
+hates = URIRef("urn:hates")
+knows = URIRef("urn:knows")
+
+
+def check_each_key(store):
+    """
+    Makes the store scan as it did before its iterators were bounded by
+    prefix: from prefix on, with a startswith() check on every key.
+    """
+
+    def iterator(db, prefix, include_value=True):
+        keys = db.iterator(start=prefix, include_value=include_value)
+        if include_value:
+            return takewhile(lambda item: item[0].startswith(prefix), keys)
+        return takewhile(lambda key: key.startswith(prefix), keys)
+
+    store._LevelDBStore__iterator = iterator
+
+
+class ScanTestCase(unittest.TestCase):
+    """
+    Benchmarks the range scans of triples(), len() and pattern remove(),
+    scanning up to a startswith() check on every key against the
+    prefix-bounded plyvel iterators the store uses, which end in C.
+    """
+
+    storetest = True
+    performancetest = True
+    triples = 200000
+
+    def setUp(self):
+        self.gcold = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        self.path = tempfile.mktemp(prefix="testleveldb")
+        self.graph = ConjunctiveGraph(LevelDBStore())
+        self.graph.open(self.path, create=True)
+        self.g = Graph(self.graph.store, URIRef("urn:graph"))
+        things = [URIRef(f"urn:thing{n}") for n in range(self.triples // 200)]
+        self.graph.addN(
+            (s, p, o, self.g)
+            for s in things
+            for p in (likes, hates)
+            for o in things[:100]
+        )
+        # Past the ranges scanned, so a scan has to stop at their end
+        self.graph.addN(
+            (s, knows, o, Graph(self.graph.store, URIRef("urn:other")))
+            for s in things
+            for o in things[:10]
+        )
+        # len() scans rather than reading the counts
+        self.graph.store._LevelDBStore__counted = False
+
+    def tearDown(self):
+        self.graph.close()
+        self.graph.destroy(self.path)
+        if self.gcold:
+            gc.enable()
+
+    def scans(self, predicate):
+        timings = []
+        t0 = time()
+        found = sum(1 for _ in self.graph.triples((None, hates, None)))
+        timings.append(time() - t0)
+        self.assertEqual(found, self.triples // 2)
+        t0 = time()
+        length = len(self.g)
+        timings.append(time() - t0)
+        self.assertEqual(length, self.triples)
+        t0 = time()
+        length = len(self.graph)
+        timings.append(time() - t0)
+        self.assertEqual(length, self.triples + self.triples // 20)
+        # Each run removes triples of a different predicate, as many
+        t0 = time()
+        self.graph.remove((None, predicate, None))
+        timings.append(time() - t0)
+        self.assertEqual(len(self.graph), self.triples // 2 + self.triples // 20)
+        return timings
+
+    def testScans(self):
+        # Both runs decode from a warm term cache
+        for _ in self.graph.triples((None, None, None)):
+            pass
+        bounded = self.scans(likes)
+        self.graph.addN(
+            (s, likes, o, self.g) for s, p, o in self.graph.triples((None, hates, None))
+        )
+        check_each_key(self.graph.store)
+        checked = self.scans(hates)
+        for name, before, after in zip(
+            (
+                "triples((None, p, None))",
+                "len(context)",
+                "len()",
+                "remove((None, p, None))",
+            ),
+            checked,
+            bounded,
+        ):
+            log.debug(f"{name:25}: {before:.3f}s checked, {after:.3f}s bounded")
+
+
+if __name__ == "__main__":
+    unittest.main()
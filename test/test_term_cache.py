@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore, TermCache
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph(store=LevelDBStore(term_cache_size=100))
+    graph.open(path, create=True)
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def test_scan_resistant():
+    cache = TermCache(100)
+    hot = list(range(10))
+    for key in hot:
+        cache.put(key, key)
+    for i in range(1000):
+        # The hot keys are asked for again after leaving the queue
+        for key in hot:
+            if cache.get(key) is None:
+                cache.put(key, key)
+        cache.put(("scan", i), i)
+    assert len(cache) <= 100
+    for i in range(1000):
+        cache.put(("scan", i, "again"), i)
+    assert all(cache.get(key) == key for key in hot)
+
+
+def test_disabled():
+    cache = TermCache(0)
+    cache.put(1, 1)
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_counters_and_close(getgraph):
+    graph, path = getgraph
+    store = graph.store
+    g = Graph(store, graphuri)
+    g.add((michel, likes, pizza))
+    list(graph.triples((None, likes, None)))
+    list(graph.triples((None, likes, None)))
+    info = store.term_cache_info()
+    assert info["ids"]["hits"] > 0
+    assert info["terms"]["hits"] > 0
+    assert info["terms"]["size"] > 0
+    assert LevelDBStore().term_cache_info()["ids"]["size"] == 0
+    graph.close()
+    assert store.term_cache_info()["terms"] == {"hits": 0, "misses": 0, "size": 0}
+    graph.open(path, create=False)
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+
+
+def test_remove_unused_terms(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.remove((michel, likes, pizza))
+    graph.store.remove_unused_terms()
+    g.add((pizza, likes, michel))
+    assert list(graph.triples((None, None, None))) == [(pizza, likes, michel)]
+
+
+def test_queries_do_not_allocate_ids(getgraph):
+    graph, path = getgraph
+    store = graph.store
+    g = Graph(store, graphuri)
+    g.add((michel, likes, pizza))
+    terms = store._terms
+    typo = URIRef("urn:micheal")
+    othergraph = Graph(store, URIRef("urn:othergraph"))
+    assert list(graph.triples((typo, likes, None))) == []
+    assert list(othergraph.triples((None, None, None))) == []
+    assert list(graph.contexts((typo, likes, pizza))) == []
+    assert len(othergraph) == 0
+    assert store.estimate((None, typo, None)) == 0
+    graph.remove((typo, None, None))
+    assert store._terms == terms
+    assert store._term_id(typo) is None
+    assert store.term_cache_info()["unknown"]["hits"] > 0
+    # Adding the term gives it an id, despite the negative cache
+    g.add((typo, likes, pizza))
+    assert set(graph.subjects(likes, pizza)) == {michel, typo}
+    assert store._term_id(typo) is not None
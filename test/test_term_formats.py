@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import BNode, ConjunctiveGraph, Graph, Literal, URIRef, Variable
+from rdflib.graph import QuotedGraph
+from rdflib.namespace import XSD
+from rdflib_leveldb.leveldbstore import CompactTerms, LevelDBStore
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+
+terms = [
+    michel,
+    BNode("b1"),
+    Variable("x"),
+    Literal("pizza"),
+    Literal("pizza", lang="it"),
+    Literal(10),
+    Literal("2021-11-16", datatype=XSD.date),
+    Literal("no\ud800pe"),
+    Literal(""),
+]
+
+
+@pytest.fixture(params=["pickle", "compact"])
+def getpath(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path, request.param
+    LevelDBStore().destroy(path)
+
+
+def test_compact_terms_roundtrip():
+    store = LevelDBStore()
+    codec = CompactTerms(store)
+    for term in terms:
+        loaded = codec.loads(codec.dumps(term))
+        assert loaded == term
+        assert type(loaded) is type(term)
+        if isinstance(term, Literal):
+            assert loaded.language == term.language
+            assert loaded.datatype == term.datatype
+    for graph in (Graph(store, graphuri), QuotedGraph(store, BNode("q"))):
+        loaded = codec.loads(codec.dumps(graph))
+        assert type(loaded) is type(graph)
+        assert loaded.store is store
+        assert loaded.identifier == graph.identifier
+    # Anything else is pickled
+    assert codec.loads(codec.dumps((michel, 1))) == (michel, 1)
+
+
+def test_unknown_term_format():
+    with pytest.raises(ValueError):
+        LevelDBStore(term_format="json")
+
+
+def test_term_formats(getpath):
+    path, term_format = getpath
+    graph = ConjunctiveGraph(LevelDBStore(term_format=term_format))
+    graph.open(path, create=True)
+    g = Graph(graph.store, graphuri)
+    for term in terms:
+        g.add((michel, likes, term))
+    graph.close()
+
+    # The format is read back from the store, whatever is asked for
+    other = "compact" if term_format == "pickle" else "pickle"
+    graph = ConjunctiveGraph(LevelDBStore(term_format=other))
+    graph.open(path, create=False)
+    assert graph.store.term_format == term_format
+    assert set(graph.objects(michel, likes)) == set(terms)
+    assert [c.identifier for c in graph.contexts()] == [graphuri]
+    assert len(Graph(graph.store, graphuri)) == len(terms)
+    graph.close()
+
+
+def test_store_without_format_header_is_pickle(getpath):
+    path, term_format = getpath
+    graph = ConjunctiveGraph(LevelDBStore(term_format="pickle"))
+    graph.open(path, create=True)
+    Graph(graph.store, graphuri).add((michel, likes, pizza))
+    # As written before the format header existed
+    graph.store.db.delete(b"metaterm_format")
+    graph.close()
+
+    graph = ConjunctiveGraph(LevelDBStore())
+    graph.open(path, create=False)
+    assert graph.store.term_format == "pickle"
+    assert list(graph.triples((michel, None, None))) == [(michel, likes, pizza)]
+    graph.close()
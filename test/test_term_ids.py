@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+
+
+@pytest.fixture(params=["decimal", "binary", "varint"])
+def getpath(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    yield path, request.param
+    LevelDBStore().destroy(path)
+
+
+def terms_counter(store):
+    return int(store.db.get(b"k2i__terms__"))
+
+
+def test_ids_are_leased_in_blocks(getpath):
+    path, key_format = getpath
+    store = LevelDBStore(key_format=key_format, term_block_size=10)
+    graph = Graph(store, URIRef("urn:graph"))
+    graph.open(path, create=True)
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:b")))
+    # graph, a, likes and b
+    assert store._terms == 4
+    assert terms_counter(store) == 10
+    for n in range(6):
+        graph.add((URIRef("urn:a"), likes, URIRef(f"urn:{n}")))
+    assert store._terms == 10
+    assert terms_counter(store) == 10
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:c")))
+    assert terms_counter(store) == 20
+    graph.close()
+    # A clean close hands back the rest of the block
+    assert store._terms == 11
+    graph.open(path, create=False)
+    assert terms_counter(store) == 11
+    assert store._terms == 11
+    graph.close()
+
+
+def test_recovery_after_crash(getpath):
+    path, key_format = getpath
+    store = LevelDBStore(key_format=key_format, term_block_size=10)
+    graph = Graph(store, URIRef("urn:graph"))
+    graph.open(path, create=True)
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:b")))
+    # Crash, without closing the store
+    store.db.close()
+
+    store = LevelDBStore(term_block_size=10)
+    graph = Graph(store, URIRef("urn:graph"))
+    graph.open(path, create=False)
+    # Numerically sorted ids allow the highest id in use to be found,
+    # otherwise the rest of the leased block is skipped
+    assert store._terms == (10 if key_format == "decimal" else 4)
+    graph.add((URIRef("urn:a"), likes, URIRef("urn:c")))
+    assert set(graph.objects(URIRef("urn:a"), likes)) == {
+        URIRef("urn:b"),
+        URIRef("urn:c"),
+    }
+    assert len(graph) == 2
+    graph.close()
+
+
+def dictionary_size(store):
+    return len(list(store.db.iterator(prefix=b"i2k", include_value=False)))
+
+
+def test_remove_unused_terms(getpath):
+    path, key_format = getpath
+    store = LevelDBStore(key_format=key_format)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    kept = Graph(store, URIRef("urn:kept"))
+    dropped = Graph(store, URIRef("urn:dropped"))
+    kept.add((URIRef("urn:a"), likes, URIRef("urn:b")))
+    for n in range(10):
+        dropped.add((URIRef("urn:a"), likes, URIRef(f"urn:{n}")))
+    # kept, a, likes, b, dropped and 0-9
+    assert dictionary_size(store) == 15
+    store.remove_graph(dropped)
+    assert store.remove_unused_terms() == 11
+    assert dictionary_size(store) == 4
+    assert set(kept.objects(URIRef("urn:a"), likes)) == {URIRef("urn:b")}
+    # The freed ids at the top of the range are allocated again
+    assert store._terms == 4
+    kept.add((URIRef("urn:a"), likes, URIRef("urn:c")))
+    assert store._terms == 5
+    assert store.remove_unused_terms() == 0
+    graph.close()
+
+    graph.open(path, create=False)
+    assert set(kept.objects(URIRef("urn:a"), likes)) == {
+        URIRef("urn:b"),
+        URIRef("urn:c"),
+    }
+    assert set(c.identifier for c in graph.contexts()) == {URIRef("urn:kept")}
+    graph.close()
+
+
+def test_remove_unused_terms_in_transaction(getpath):
+    path, key_format = getpath
+    store = LevelDBStore(key_format=key_format, transactional=True)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    g = Graph(store, URIRef("urn:graph"))
+    g.add((URIRef("urn:a"), likes, URIRef("urn:b")))
+    graph.commit()
+    g.remove((URIRef("urn:a"), likes, URIRef("urn:b")))
+    with pytest.raises(AssertionError):
+        store.remove_unused_terms()
+    graph.rollback()
+    assert store.remove_unused_terms() == 0
+    assert list(graph.triples((None, None, None))) == [
+        (URIRef("urn:a"), likes, URIRef("urn:b"))
+    ]
+    graph.close()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+import threading
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+likes = URIRef("urn:likes")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture(
+    params=[dict(), dict(write_behind=True), dict(transactional=True)],
+    ids=["default", "write_behind", "transactional"],
+)
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(batch_size=10, **request.param)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    yield graph
+    graph.close()
+    graph.destroy(path)
+
+
+def test_readers_see_whole_batches(getgraph):
+    graph = getgraph
+    store = graph.store
+    g = Graph(store, graphuri)
+    subjects = [URIRef(f"urn:s{n}") for n in range(50)]
+    done = threading.Event()
+    errors = []
+    seen = set()
+
+    def write():
+        try:
+            # Each addN() and remove() writes 10 triples in one batch
+            for s in subjects:
+                graph.addN((s, likes, URIRef(f"urn:o{m}"), g) for m in range(10))
+                store.commit()
+            for s in subjects:
+                g.remove((s, None, None))
+                store.commit()
+        finally:
+            done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                seen.add(len(graph))
+                seen.add(len(g))
+                seen.add(len(list(graph.triples((None, likes, None)))))
+                seen.add(len(list(g.triples((None, None, None)))))
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for n in range(2)]
+    for reader in readers:
+        reader.start()
+    write()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert all(n % 10 == 0 for n in seen), sorted(seen)
+    assert len(graph) == 0
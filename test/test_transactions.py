@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import pytest
+import tempfile
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+tarek = URIRef("urn:tarek")
+bob = URIRef("urn:bob")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+cheese = URIRef("urn:cheese")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture
+def getgraph():
+    path = tempfile.mktemp(prefix="testleveldb")
+    graph = ConjunctiveGraph(store=LevelDBStore(transactional=True))
+    graph.open(path, create=True)
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def reopen(graph, path):
+    graph.close(commit_pending_transaction=False)
+    graph.open(path, create=False)
+
+
+def test_transaction_aware(getgraph):
+    graph, path = getgraph
+    assert graph.store.transaction_aware is True
+    assert LevelDBStore().transaction_aware is False
+
+
+def test_read_your_writes(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.add((tarek, likes, pizza))
+    assert len(g) == 2
+    assert set(g.subjects(likes, pizza)) == {michel, tarek}
+    assert (michel, likes, pizza) in graph
+    assert list(graph.contexts((michel, likes, pizza))) == [g]
+    g.remove((tarek, likes, pizza))
+    assert set(g.subjects(likes, pizza)) == {michel}
+
+
+def test_commit(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    graph.commit()
+    g.add((bob, likes, cheese))
+    reopen(graph, path)
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+
+
+def test_rollback(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    graph.commit()
+    g.add((bob, likes, cheese))
+    g.remove((michel, likes, pizza))
+    assert len(graph) == 1
+    graph.rollback()
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+    reopen(graph, path)
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+
+
+def test_close_commits_pending_transaction(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    graph.close(commit_pending_transaction=True)
+    graph.open(path, create=False)
+    assert len(graph) == 1
+
+
+def test_remove_pattern_in_transaction(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.add((michel, likes, pizza))
+    g.add((michel, likes, cheese))
+    graph.commit()
+    g.add((bob, likes, cheese))
+    graph.remove((None, likes, cheese))
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
+    graph.commit()
+    reopen(graph, path)
+    assert list(graph.triples((None, None, None))) == [(michel, likes, pizza)]
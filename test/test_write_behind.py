@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import pytest
+import subprocess
+import sys
+import tempfile
+import threading
+from rdflib import ConjunctiveGraph, Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+michel = URIRef("urn:michel")
+likes = URIRef("urn:likes")
+pizza = URIRef("urn:pizza")
+
+graphuri = URIRef("urn:graph")
+
+
+@pytest.fixture(params=[1, 1000])
+def getgraph(request):
+    path = tempfile.mktemp(prefix="testleveldb")
+    store = LevelDBStore(write_behind=True, write_queue_size=request.param)
+    graph = ConjunctiveGraph(store)
+    graph.open(path, create=True)
+    yield graph, path
+    graph.close()
+    graph.destroy(path)
+
+
+def test_reads_see_queued_writes(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    for n in range(100):
+        g.add((michel, likes, URIRef(f"urn:{n}")))
+        assert (michel, likes, URIRef(f"urn:{n}")) in g
+    assert len(g) == 100
+    g.remove((michel, likes, URIRef("urn:0")))
+    assert (michel, likes, URIRef("urn:0")) not in g
+    assert len(graph) == 99
+    graph.store.flush()
+    assert len(graph) == 99
+
+
+def test_close_writes_queued_writes(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+    g.addN((michel, likes, URIRef(f"urn:{n}"), g) for n in range(50))
+    graph.close()
+    graph.open(path, create=False)
+    assert len(g) == 50
+    assert list(graph.contexts((michel, likes, URIRef("urn:1")))) == [g]
+
+
+exit_without_close = """
+import sys, time
+from rdflib import Graph, URIRef
+from rdflib_leveldb.leveldbstore import LevelDBStore
+
+store = LevelDBStore(write_behind=True)
+graph = Graph(store, URIRef("urn:graph"))
+graph.open(sys.argv[1], create=True)
+# A slow writer, so that writes are still queued at exit
+write_batch = store._LevelDBStore__write_batch
+store._LevelDBStore__write_batch = lambda pending: (
+    time.sleep(0.1),
+    write_batch(pending),
+)
+for n in range(5):
+    graph.add((URIRef("urn:michel"), URIRef("urn:likes"), URIRef(f"urn:{n}")))
+"""
+
+
+def test_exit_writes_queued_writes():
+    path = tempfile.mktemp(prefix="testleveldb")
+    subprocess.run([sys.executable, "-c", exit_without_close, path], check=True)
+    graph = Graph(LevelDBStore(), graphuri)
+    graph.open(path, create=False)
+    assert len(graph) == 5
+    graph.close()
+    graph.destroy(path)
+
+
+def test_concurrent_producers(getgraph):
+    graph, path = getgraph
+    g = Graph(graph.store, graphuri)
+
+    def produce(n):
+        for m in range(50):
+            g.add((URIRef(f"urn:s{n}"), likes, URIRef(f"urn:o{m}")))
+
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    graph.store.flush()
+    assert len(g) == 200
+    assert len(set(graph.subjects(likes, URIRef("urn:o7")))) == 4